@@ -1,12 +1,445 @@
 import tkinter as tk
-import winsound
-from PIL import Image, ImageTk
+import argparse
+import array
+import collections
+import io
 import math
+import queue
 import random
+import shutil
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+import wave
+
+try:
+    import winsound
+except ImportError:  # Not Windows; AudioEngine falls back to another sink
+    winsound = None
+
+# Playfield
+WIDTH, HEIGHT = 600, 400
+PADDLE_Y, PADDLE_HEIGHT = 380, 10
+BALL_SIZE = 20
+MAX_CONTACTS = 16  # Bounces resolved per tick before the ball just stops for the tick
+CONTACT_TIE = 1e-9  # Contacts this close in time are struck together
+
+# Brick wall layout: BRICK_ROWS x BRICK_COLS cells of BRICK_PITCH_X x BRICK_PITCH_Y pixels
+BRICK_ROWS, BRICK_COLS = 5, 7
+BRICK_WIDTH, BRICK_HEIGHT = 80, 20
+BRICK_PITCH_X, BRICK_PITCH_Y = 85, 30
+BRICK_TOP = 50
+BRICK_COLORS = ["#e74c3c", "#f39c12", "#2ecc71", "#9b59b6", "#3498db"]
+
+# Frame timing
+TICK_RATE = 60  # Model steps per second, whatever the display manages
+MAX_TICKS_PER_FRAME = 5  # Past this the game slows down instead of jumping
+FRAME_STATS = 120  # Frame intervals kept for the FPS and jitter figures
+
+# Audio
+SAMPLE_RATE = 22050
+AUDIO_QUEUE_SIZE = 32  # Sounds beyond this many waiting are dropped, never waited on
+# Sound effects: name -> (frequency in Hz, duration in ms), the tones the game always beeped
+SOUNDS = {
+    "wall": (400, 20),
+    "paddle": (660, 25),
+    "brick": (330, 25),
+    "lose": (55, 1000),
+    "win": (880, 500),
+}
+
+def synthesize(frequency, duration):
+    """A square-wave tone as 16-bit mono samples, faded in and out over 2 ms to avoid clicks."""
+    count = SAMPLE_RATE * duration // 1000
+    period = SAMPLE_RATE / frequency
+    fade = SAMPLE_RATE // 500
+    amplitude = 8000
+    samples = array.array("h", bytes(2 * count))
+    for i in range(count):
+        level = amplitude if (i % period) < period / 2 else -amplitude
+        ramp = min(i, count - 1 - i, fade)
+        samples[i] = int(level * ramp / fade)
+    return samples
+
+def wav_bytes(samples):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+class NullSink:
+    """Discards sound, for headless runs and --mute."""
+    def play(self, samples):
+        pass
+    
+    def close(self):
+        pass
+
+class WavFileSink:
+    """Appends everything played to a WAV file, back to back."""
+    def __init__(self, path):
+        self.wav = wave.open(path, "wb")
+        self.wav.setnchannels(1)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(SAMPLE_RATE)
+    
+    def play(self, samples):
+        self.wav.writeframes(samples.tobytes())
+    
+    def close(self):
+        self.wav.close()
+
+class WinsoundSink:
+    def play(self, samples):
+        winsound.PlaySound(wav_bytes(samples), winsound.SND_MEMORY)
+    
+    def close(self):
+        pass
+
+class AplaySink:
+    """Plays through ALSA's aplay command on Linux."""
+    def play(self, samples):
+        subprocess.run(["aplay", "-q", "-"], input=wav_bytes(samples),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    def close(self):
+        pass
+
+def default_sink():
+    if winsound is not None:
+        return WinsoundSink()
+    if shutil.which("aplay"):
+        return AplaySink()
+    return NullSink()
+
+class AudioEngine:
+    """Sound effects played by a background thread so the game loop never waits on audio.
+    
+    Every tone in SOUNDS is synthesized once up front. play() only queues a
+    name; the audio thread takes whatever has queued up and hands each tone
+    to the sink in turn, and the sink may block as long as it likes. Nothing
+    is mixed sample by sample in Python, which would hold the GIL against the
+    Tk thread.
+    """
+    def __init__(self, sink=None):
+        self.sink = sink if sink is not None else default_sink()
+        self.buffers = {name: synthesize(*tone) for name, tone in SOUNDS.items()}
+        self.queue = queue.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self.played = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def play(self, name):
+        try:
+            self.queue.put_nowait(name)
+        except queue.Full:
+            self.dropped += 1
+    
+    def run(self):
+        while True:
+            names = [self.queue.get()]
+            while not self.queue.empty():
+                names.append(self.queue.get_nowait())
+            # A burst of the same sound plays once; different sounds play one after another
+            for name in dict.fromkeys(names):
+                if name is None:
+                    return
+                self.sink.play(self.buffers[name])
+                self.played += 1
+    
+    def close(self):
+        """Play out what is queued, then stop the audio thread and the sink."""
+        self.queue.put(None)
+        self.thread.join()
+        self.sink.close()
+
+class FrameScheduler:
+    """Calls callback(ticks) on Tk's event loop at a steady TICK_RATE.
+    
+    after() only promises "no sooner than", so waiting a fixed 16 ms after
+    each frame runs slow by however long the frame took. Instead, tick n is
+    due at start + n / rate: each frame is told how many fixed ticks are owed
+    by now, and after() is asked to wait just until the next one is due, so a
+    late frame is made up rather than carried forward. The callback returns
+    False to stop.
+    """
+    def __init__(self, root, callback, rate=TICK_RATE, clock=time.perf_counter):
+        self.root = root
+        self.callback = callback
+        self.period = 1 / rate
+        self.clock = clock
+        self.job = None
+        self.intervals = collections.deque(maxlen=FRAME_STATS)
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.intervals.clear()
+        self.frames = 0
+        self.ticks = 0
+        self.dropped_ticks = 0
+        self.last_frame = None
+    
+    def start(self):
+        self.stop()
+        self.reset_stats()
+        self.start_time = self.clock()
+        self.job = self.root.after(0, self.frame)
+    
+    def stop(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+    
+    def frame(self):
+        self.job = None
+        now = self.clock()
+        if self.last_frame is not None:
+            self.intervals.append(now - self.last_frame)
+        self.last_frame = now
+        self.frames += 1
+        
+        ticks = int((now - self.start_time) / self.period) - self.ticks
+        if ticks > MAX_TICKS_PER_FRAME:
+            # Too far behind to catch up; forget the backlog
+            self.dropped_ticks += ticks - MAX_TICKS_PER_FRAME
+            self.start_time += (ticks - MAX_TICKS_PER_FRAME) * self.period
+            ticks = MAX_TICKS_PER_FRAME
+        self.ticks += ticks
+        if self.callback(ticks) is False:
+            return
+        
+        deadline = self.start_time + (self.ticks + 1) * self.period
+        delay = max(1, math.ceil((deadline - self.clock()) * 1000))
+        self.job = self.root.after(delay, self.frame)
+    
+    def stats(self):
+        """Achieved frame rate and frame-time jitter over the last FRAME_STATS frames, in ms."""
+        intervals = self.intervals
+        mean = sum(intervals) / len(intervals) if intervals else 0.0
+        return {
+            "frames": self.frames,
+            "ticks": self.ticks,
+            "dropped_ticks": self.dropped_ticks,
+            "fps": 1 / mean if mean else 0.0,
+            "frame_ms": mean * 1000,
+            "jitter_ms": statistics.pstdev(intervals) * 1000 if intervals else 0.0,
+            "max_frame_ms": max(intervals) * 1000 if intervals else 0.0,
+        }
+
+class BrickGrid:
+    """The brick wall as a 2D grid, one optional brick per cell.
+    
+    A brick's cell follows from its position, so finding the bricks under a
+    box is a floor division per axis instead of a scan over every brick.
+    """
+    def __init__(self, rows=BRICK_ROWS, cols=BRICK_COLS, top=BRICK_TOP):
+        self.rows = rows
+        self.cols = cols
+        self.top = top
+        self.cells = [[True] * cols for _ in range(rows)]
+        self.count = rows * cols
+    
+    def rect(self, row, col):
+        x0 = col * BRICK_PITCH_X
+        y0 = row * BRICK_PITCH_Y + self.top
+        return x0, y0, x0 + BRICK_WIDTH, y0 + BRICK_HEIGHT
+    
+    def overlapping(self, x0, y0, x1, y1):
+        """Cells of live bricks touching the box (edges inclusive), in row-major order."""
+        row0 = max(0, int((y0 - self.top) // BRICK_PITCH_Y))
+        row1 = min(self.rows - 1, int((y1 - self.top) // BRICK_PITCH_Y))
+        col0 = max(0, int(x0 // BRICK_PITCH_X))
+        col1 = min(self.cols - 1, int(x1 // BRICK_PITCH_X))
+        hits = []
+        for row in range(row0, row1 + 1):
+            cells = self.cells[row]
+            for col in range(col0, col1 + 1):
+                if cells[col]:
+                    bx0, by0, bx1, by1 = self.rect(row, col)
+                    if x1 >= bx0 and x0 <= bx1 and y1 >= by0 and y0 <= by1:
+                        hits.append((row, col))
+        return hits
+    
+    def remove(self, row, col):
+        self.cells[row][col] = False
+        self.count -= 1
+    
+    def __iter__(self):
+        """Cells of the live bricks."""
+        for row, cells in enumerate(self.cells):
+            for col, alive in enumerate(cells):
+                if alive:
+                    yield row, col
+
+def sweep(x, y, dx, dy, rect):
+    """When a BALL_SIZE box at (x, y) moving by (dx, dy) first touches rect.
+    
+    Returns (t, axis) with t the fraction of the move at contact and axis
+    "x", "y" or "xy" (a corner) for the face struck, or None if it misses or
+    the box is already inside or leaving. Growing the rect by the ball's size
+    turns this into a ray against a box, solved one axis at a time.
+    """
+    x0, y0, x1, y1 = rect
+    x0 -= BALL_SIZE
+    y0 -= BALL_SIZE
+    entry, exit = [], []
+    for pos, delta, low, high in ((x, dx, x0, x1), (y, dy, y0, y1)):
+        if delta:
+            near, far = (low, high) if delta > 0 else (high, low)
+            entry.append((near - pos) / delta)
+            exit.append((far - pos) / delta)
+        elif low < pos < high:
+            entry.append(-math.inf)
+            exit.append(math.inf)
+        else:
+            return None
+    t = max(entry)
+    if t < 0 or t > 1 or t >= min(exit):
+        return None
+    tx, ty = entry
+    return t, "x" if tx > ty else "y" if ty > tx else "xy"
+
+class BreakoutModel:
+    """Authoritative Breakout state, kept in Python so a tick never asks Tk for coordinates.
+    
+    The ball is a BALL_SIZE box at (ball_x, ball_y), the paddle a
+    paddle_width box at (paddle_x, PADDLE_Y). step() advances one tick and
+    returns what happened as a list of events for the view and sound.
+    """
+    def __init__(self, level=1, rows=BRICK_ROWS, cols=BRICK_COLS):
+        self.level = level
+        self.ball_speed = 4 + 0.5 * (level - 1)  # Faster every level
+        self.paddle_width = 100
+        self.paddle_x = 250
+        self.ball_x, self.ball_y = 290, 340
+        angle = random.uniform(math.pi/4, 3*math.pi/4)  # Random angle between 45-135 degrees
+        self.ball_dx = self.ball_speed * math.cos(angle)
+        self.ball_dy = -self.ball_speed * math.sin(angle)
+        self.bricks = BrickGrid(rows, cols)
+        self.score = 0
+    
+    def move_paddle(self, center_x):
+        x = center_x - self.paddle_width/2
+        self.paddle_x = max(0, min(x, WIDTH - self.paddle_width))
+    
+    def step(self):
+        """Advance one tick. Events: "wall", "paddle", ("brick", row, col), "lost", "won".
+        
+        Collisions are swept rather than tested after the move: the earliest
+        contacts along the tick's path are found, the ball moves there and
+        bounces off all of them at once, and the rest of the path is swept
+        again. A fast ball can't pass through a brick or the paddle, and may
+        hit several in one tick, including two bricks it meets side by side.
+        """
+        events = []
+        remaining = 1.0
+        for _ in range(MAX_CONTACTS):
+            dx, dy = self.ball_dx * remaining, self.ball_dy * remaining
+            contacts = self.first_contacts(dx, dy)
+            if not contacts:
+                self.ball_x += dx
+                self.ball_y += dy
+                break
+            t = contacts[0][0]
+            self.ball_x += dx * t
+            self.ball_y += dy * t
+            remaining *= 1 - t
+            events += self.bounce(contacts)
+        
+        # Game over conditions
+        if self.ball_y + BALL_SIZE >= HEIGHT:
+            events.append("lost")
+        elif not self.bricks.count:
+            events.append("won")
+        return events
+    
+    def first_contacts(self, dx, dy):
+        """Every (t, axis, what) tied for earliest as the ball moves by (dx, dy), or []."""
+        x, y = self.ball_x, self.ball_y
+        contacts = []
+        
+        # Walls, with no bottom one
+        if dx < 0:
+            contacts.append((max(0, -x / dx), "x", "wall"))
+        elif dx > 0:
+            contacts.append((max(0, (WIDTH - BALL_SIZE - x) / dx), "x", "wall"))
+        if dy < 0:
+            contacts.append((max(0, -y / dy), "y", "wall"))
+        
+        # Paddle. It moves with the mouse, not along a path, so it can slide under a
+        # ball already in its band; a falling ball there bounces at once, as it used to
+        paddle = (self.paddle_x, PADDLE_Y, self.paddle_x + self.paddle_width, PADDLE_Y + PADDLE_HEIGHT)
+        if (dy > 0 and x + BALL_SIZE >= paddle[0] and x <= paddle[2]
+                and PADDLE_Y <= y + BALL_SIZE <= PADDLE_Y + PADDLE_HEIGHT):
+            contacts.append((0, "y", "paddle"))
+        else:
+            hit = sweep(x, y, dx, dy, paddle)
+            if hit:
+                contacts.append((*hit, "paddle"))
+        
+        # Bricks, narrowed to the grid cells the path's bounding box covers
+        for row, col in self.bricks.overlapping(min(x, x + dx), min(y, y + dy),
+                                                max(x, x + dx) + BALL_SIZE, max(y, y + dy) + BALL_SIZE):
+            hit = sweep(x, y, dx, dy, self.bricks.rect(row, col))
+            if hit:
+                contacts.append((*hit, (row, col)))
+        
+        contacts = [contact for contact in contacts if contact[0] <= 1]
+        if not contacts:
+            return []
+        first = min(contact[0] for contact in contacts)
+        return [contact for contact in contacts if contact[0] <= first + CONTACT_TIE]
+    
+    def bounce(self, contacts):
+        """Reflect the ball off everything it touched at once and return the events.
+        
+        Every brick struck breaks, and each axis reflects once however many
+        faces along it were struck.
+        """
+        events = []
+        axes = set()
+        paddle_top = False
+        for t, axis, what in contacts:
+            if what == "paddle" and axis == "y" and self.ball_dy > 0:
+                paddle_top = True
+                events.append("paddle")
+                continue
+            axes.update(axis)
+            if what in ("wall", "paddle"):
+                events.append(what)
+            else:
+                row, col = what
+                self.bricks.remove(row, col)
+                self.score += 10
+                events.append(("brick", row, col))
+        
+        if "x" in axes:
+            self.ball_dx *= -1
+        if "y" in axes:
+            self.ball_dy *= -1
+        if paddle_top:
+            # Calculate hit position for directional bounce
+            relative_x = self.ball_x + BALL_SIZE/2 - (self.paddle_x + self.paddle_width/2)
+            normalized_x = max(-1, min(1, relative_x / (self.paddle_width / 2)))
+            angle = normalized_x * (math.pi/3)  # Max 60 degrees from vertical
+            
+            # Update ball direction
+            speed = math.sqrt(self.ball_dx**2 + self.ball_dy**2)
+            self.ball_dx = speed * math.sin(angle)
+            self.ball_dy = -speed * math.cos(angle)
+        return events
 
 class BreakoutGame:
-    def __init__(self, root):
+    def __init__(self, root, audio=None):
         self.root = root
+        self.audio = audio if audio is not None else AudioEngine()
+        self.scheduler = FrameScheduler(root, self.game_loop)
         self.root.title("BREAKOUT 4K")
         self.root.geometry("600x400")
         self.root.resizable(False, False)
@@ -27,8 +460,14 @@ class BreakoutGame:
         for frame in (self.menu_frame, self.game_frame, self.game_over_frame, self.win_frame):
             frame.grid(row=0, column=0, sticky="nsew")
         
-        # Create the main menu
+        # No game runs until start_game; the canvas binds <Motion> before that
+        self.game_active = False
+        
+        # Build every screen once; showing one only updates its text
         self.create_menu()
+        self.create_game_screen()
+        self.create_game_over()
+        self.create_win_screen()
         
         # Show menu initially
         self.show_menu()
@@ -154,59 +593,45 @@ class BreakoutGame:
             command=controls_window.destroy
         ).pack(pady=20)
     
-    def start_game(self):
-        self.show_game()
-        
-        # Initialize game elements
+    def create_game_screen(self):
+        """Build the canvas and every item on it once; start_game only resets them."""
         self.canvas = tk.Canvas(self.game_frame, bg="black", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
         
         # Paddle
-        self.paddle_width = 100
         self.paddle = self.canvas.create_rectangle(
-            250, 380, 250 + self.paddle_width, 390, 
+            0, PADDLE_Y, 0, PADDLE_Y + PADDLE_HEIGHT,
             fill="#3498db", outline="#2980b9", width=2
         )
         
         # Ball
         self.ball = self.canvas.create_oval(
-            290, 340, 310, 360, 
+            0, 0, BALL_SIZE, BALL_SIZE,
             fill="#e74c3c", outline="#c0392b", width=2
         )
         
-        # Set initial ball speed
-        self.ball_speed = 4
-        angle = random.uniform(math.pi/4, 3*math.pi/4)  # Random angle between 45-135 degrees
-        self.ball_dx = self.ball_speed * math.cos(angle)
-        self.ball_dy = -self.ball_speed * math.sin(angle)
-        
-        # Bricks
-        self.bricks = []
-        colors = ["#e74c3c", "#f39c12", "#2ecc71", "#9b59b6", "#3498db"]
-        for i in range(5):
-            for j in range(7):
-                brick = self.canvas.create_rectangle(
-                    j*85, i*30+50,
-                    j*85+80, i*30+70,
-                    fill=colors[i], outline="#2c3e50", width=1
-                )
-                self.bricks.append(brick)
+        # Bricks, with canvas items laid out like the model's grid; broken ones are hidden
+        grid = BrickGrid()
+        self.brick_items = [[None] * grid.cols for _ in range(grid.rows)]
+        for row, col in grid:
+            self.brick_items[row][col] = self.canvas.create_rectangle(
+                *grid.rect(row, col),
+                fill=BRICK_COLORS[row % len(BRICK_COLORS)], outline="#2c3e50", width=1
+            )
         
         # Score
-        self.score = 0
         self.score_text = self.canvas.create_text(
             50, 20, 
-            text=f"SCORE: {self.score}", 
+            text="", 
             fill="white", 
             font=("Arial", 12, "bold"),
             anchor="w"
         )
         
         # Level
-        self.level = 1
         self.level_text = self.canvas.create_text(
             550, 20, 
-            text=f"LEVEL: {self.level}", 
+            text="", 
             fill="white", 
             font=("Arial", 12, "bold"),
             anchor="e"
@@ -214,83 +639,82 @@ class BreakoutGame:
         
         # Mouse controls
         self.root.bind("<Motion>", self.on_mouse_move)
+    
+    def start_game(self, level=1):
+        self.model = model = BreakoutModel(level)
+        
+        self.canvas.coords(self.paddle, model.paddle_x, PADDLE_Y,
+                           model.paddle_x + model.paddle_width, PADDLE_Y + PADDLE_HEIGHT)
+        self.canvas.coords(self.ball, model.ball_x, model.ball_y,
+                           model.ball_x + BALL_SIZE, model.ball_y + BALL_SIZE)
+        for row, items in enumerate(self.brick_items):
+            for col, item in enumerate(items):
+                alive = model.bricks.cells[row][col]
+                self.canvas.itemconfig(item, state="normal" if alive else "hidden")
+        self.canvas.itemconfig(self.score_text, text=f"SCORE: {self.score}")
+        self.canvas.itemconfig(self.level_text, text=f"LEVEL: {self.level}")
         
+        self.show_game()
         self.game_active = True
-        self.game_loop()
+        self.scheduler.start()
+    
+    @property
+    def score(self):
+        return self.model.score
+    
+    @property
+    def level(self):
+        return self.model.level
     
     def on_mouse_move(self, event):
         """Handle mouse movement"""
         if not self.game_active:
             return
-            
-        paddle_width = self.paddle_width
-        x = event.x - paddle_width/2
-        x = max(0, min(x, 600 - paddle_width))
-        self.canvas.coords(self.paddle, x, 380, x + paddle_width, 390)
+        
+        model = self.model
+        model.move_paddle(event.x)
+        self.canvas.coords(self.paddle, model.paddle_x, PADDLE_Y,
+                           model.paddle_x + model.paddle_width, PADDLE_Y + PADDLE_HEIGHT)
     
-    def game_loop(self):
+    def game_loop(self, ticks=1):
+        """One frame: run the model ticks the scheduler says are owed, then redraw once."""
         if not self.game_active:
-            return
-            
-        self.canvas.move(self.ball, self.ball_dx, self.ball_dy)
-        pos = self.canvas.coords(self.ball)
-        
-        # Wall collisions
-        if pos[0] <= 0 or pos[2] >= 600:
-            self.ball_dx *= -1
-            winsound.Beep(400, 20)
-        if pos[1] <= 0:
-            self.ball_dy *= -1
-            winsound.Beep(400, 20)
-        
-        # Paddle collision
-        paddle_pos = self.canvas.coords(self.paddle)
-        if (pos[2] >= paddle_pos[0] and pos[0] <= paddle_pos[2] and 
-            pos[3] >= paddle_pos[1] and pos[3] <= paddle_pos[3]):
-            # Calculate hit position for directional bounce
-            relative_x = (pos[0] + pos[2])/2 - (paddle_pos[0] + paddle_pos[2])/2
-            normalized_x = relative_x / (self.paddle_width / 2)
-            angle = normalized_x * (math.pi/3)  # Max 60 degrees from vertical
-            
-            # Update ball direction
-            speed = math.sqrt(self.ball_dx**2 + self.ball_dy**2)
-            self.ball_dx = speed * math.sin(angle)
-            self.ball_dy = -speed * math.cos(angle)
-            
-            winsound.Beep(660, 25)
-        
-        # Brick collisions
-        for brick in self.bricks[:]:
-            brick_pos = self.canvas.coords(brick)
-            if (pos[2] >= brick_pos[0] and pos[0] <= brick_pos[2] and 
-                pos[3] >= brick_pos[1] and pos[1] <= brick_pos[3]):
-                self.bricks.remove(brick)
-                self.canvas.delete(brick)
-                self.ball_dy *= -1
-                
-                # Update score
-                self.score += 10
-                self.canvas.itemconfig(self.score_text, text=f"SCORE: {self.score}")
-                
-                winsound.Beep(330, 25)
+            return False
+        
+        # The model decides everything; the canvas only hears about what changed
+        model = self.model
+        events = []
+        for _ in range(ticks):
+            events += model.step()
+            if "lost" in events or "won" in events:
                 break
+        self.canvas.coords(self.ball, model.ball_x, model.ball_y,
+                           model.ball_x + BALL_SIZE, model.ball_y + BALL_SIZE)
+        
+        for event in events:
+            if event == "wall":
+                self.audio.play("wall")
+            elif event == "paddle":
+                self.audio.play("paddle")
+            elif event[0] == "brick":
+                row, col = event[1:]
+                self.canvas.itemconfig(self.brick_items[row][col], state="hidden")
+                self.canvas.itemconfig(self.score_text, text=f"SCORE: {self.score}")
+                self.audio.play("brick")
         
         # Game over conditions
-        if pos[3] >= 400:
+        if "lost" in events:
             self.game_active = False
-            winsound.Beep(55, 1000)
+            self.audio.play("lose")
             self.show_game_over()
-            return
+            return False
             
         # Win condition
-        if not self.bricks:
+        if "won" in events:
             self.game_active = False
-            winsound.Beep(880, 500)
+            self.audio.play("win")
             self.show_win_screen()
-            return
-
-        # Maintain 60 FPS
-        self.root.after(16, self.game_loop)
+            return False
     
     def create_game_over(self):
         # Game over screen
@@ -302,13 +726,13 @@ class BreakoutGame:
             bg="#121212"
         ).pack(pady=50)
         
-        tk.Label(
+        self.game_over_score = tk.Label(
             self.game_over_frame,
-            text=f"FINAL SCORE: {self.score}",
             font=("Arial", 24),
             fg="#ecf0f1",
             bg="#121212"
-        ).pack(pady=20)
+        )
+        self.game_over_score.pack(pady=20)
         
         button_frame = tk.Frame(self.game_over_frame, bg="#121212")
         button_frame.pack(pady=40)
@@ -345,21 +769,21 @@ class BreakoutGame:
             bg="#121212"
         ).pack(pady=50)
         
-        tk.Label(
+        self.win_score = tk.Label(
             self.win_frame,
-            text=f"FINAL SCORE: {self.score}",
             font=("Arial", 24),
             fg="#ecf0f1",
             bg="#121212"
-        ).pack(pady=20)
+        )
+        self.win_score.pack(pady=20)
         
-        tk.Label(
+        self.win_level = tk.Label(
             self.win_frame,
-            text=f"LEVEL {self.level} COMPLETED",
             font=("Arial", 18),
             fg="#3498db",
             bg="#121212"
-        ).pack(pady=10)
+        )
+        self.win_level.pack(pady=10)
         
         button_frame = tk.Frame(self.win_frame, bg="#121212")
         button_frame.pack(pady=40)
@@ -387,9 +811,7 @@ class BreakoutGame:
         ).pack(side=tk.LEFT, padx=20)
     
     def next_level(self):
-        self.level += 1
-        self.ball_speed += 0.5  # Increase difficulty
-        self.start_game()
+        self.start_game(self.level + 1)  # The model speeds the ball up per level
     
     def show_frame(self, frame):
         frame.tkraise()
@@ -398,23 +820,88 @@ class BreakoutGame:
         self.show_frame(self.menu_frame)
     
     def show_game(self):
-        # Clear previous game if exists
-        for widget in self.game_frame.winfo_children():
-            widget.destroy()
         self.show_frame(self.game_frame)
     
     def show_game_over(self):
-        self.create_game_over()
+        self.game_over_score.config(text=f"FINAL SCORE: {self.score}")
         self.show_frame(self.game_over_frame)
     
     def show_win_screen(self):
-        self.create_win_screen()
+        self.win_score.config(text=f"FINAL SCORE: {self.score}")
+        self.win_level.config(text=f"LEVEL {self.level} COMPLETED")
         self.show_frame(self.win_frame)
     
     def exit_game(self):
         self.root.destroy()
 
-if __name__ == "__main__":
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+def soak(game, restarts=10000, samples=10):
+    """Play, lose or win, and restart the game many times without the event loop.
+    
+    Prints the widget count, canvas item count and Python heap as it goes;
+    with every screen built once, all three should stay flat. Returns the
+    samples as (restarts, widgets, items, heap bytes) tuples.
+    """
+    every = max(1, restarts // samples)
+    rows = []
+    tracemalloc.start()
+    print(f"{'restarts':>9} {'widgets':>8} {'items':>6} {'heap KB':>8}")
+    for i in range(restarts + 1):
+        if i % every == 0:
+            game.root.update_idletasks()
+            row = (i, count_widgets(game.root), len(game.canvas.find_all()),
+                   tracemalloc.get_traced_memory()[0])
+            rows.append(row)
+            print(f"{i:>9} {row[1]:>8} {row[2]:>6} {row[3] / 1024:>8.1f}")
+        if i == restarts:
+            break
+        game.start_game(i % 5 + 1)
+        game.scheduler.stop()
+        
+        # Break a brick the way play would, hitting it from just below, then end the game either way
+        model = game.model
+        row, col = random.choice(list(model.bricks))
+        x0, y0, x1, y1 = model.bricks.rect(row, col)
+        model.ball_x, model.ball_y = x0 + (BRICK_WIDTH - BALL_SIZE) / 2, y1 + 1
+        model.ball_dx, model.ball_dy = 0, -model.ball_speed
+        game.game_loop()
+        if model.bricks.cells[row][col]:
+            raise RuntimeError(f"soak restart {i} did not break brick {row}, {col}")
+        game.game_active = False
+        if i % 2:
+            game.show_win_screen()
+        else:
+            game.show_game_over()
+    tracemalloc.stop()
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Breakout 4K")
+    parser.add_argument("--mute", action="store_true", help="play no sound")
+    parser.add_argument("--sound-file", metavar="PATH",
+                        help="write the sound effects to a WAV file instead of playing them")
+    parser.add_argument("--soak", type=int, metavar="RESTARTS",
+                        help="restart the game this many times and report widget and memory counts")
+    args = parser.parse_args(argv)
+    
+    if args.sound_file:
+        sink = WavFileSink(args.sound_file)
+    elif args.mute or args.soak:
+        sink = NullSink()
+    else:
+        sink = None
+    audio = AudioEngine(sink)
+    
     root = tk.Tk()
-    game = BreakoutGame(root)
-    root.mainloop()
+    game = BreakoutGame(root, audio)
+    if args.soak:
+        soak(game, args.soak)
+        root.destroy()
+    else:
+        root.mainloop()
+    audio.close()
+
+if __name__ == "__main__":
+    main()
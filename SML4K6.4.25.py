@@ -1,15 +1,30 @@
+import time
+STARTED = time.perf_counter()  # Reference point for the time-to-first-frame report
+
 import pygame
 import sys
 import math
 import random
+import argparse
+import bisect
+import heapq
+import json
+import multiprocessing
+import os
+import platform
+import struct
+import threading
+from array import array
+from collections import OrderedDict, deque
+from operator import attrgetter
 
-# Initialize pygame
-pygame.init()
+try:
+    import numpy as np
+except ImportError:  # Vectorized levels are optional
+    np = None
 
 # Screen dimensions
 WIDTH, HEIGHT = 600, 400
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Super Mario Land")
 
 # Colors
 SKY_BLUE = (107, 140, 255)
@@ -26,14 +41,248 @@ GRAY = (100, 100, 100)
 
 # Game constants
 FPS = 60
+TICK_RATE = 60  # Simulation ticks per second, independent of the frame rate
+MAX_TICKS_PER_FRAME = 5  # Beyond this the game slows down rather than skipping more frames
 GRAVITY = 0.5
 PLAYER_SPEED = 4
 JUMP_STRENGTH = 11
 SCROLL_THRESH = 200
+CELL_SIZE = 64  # Broadphase grid cell size in pixels
+MAX_CELLS_PER_OBJECT = 64  # Bigger objects skip the grid and are tested on every query
+REINDEX_DRIFT = 64  # Re-sort an x index once its objects may have moved this far
+ENEMY_WAKE_MARGIN = 200  # Sleeping enemies wake when this close to the screen
+KEYFRAME_INTERVAL = 300  # Ticks between full snapshots in a replay
+ROLLBACK_TICKS = 300  # Ticks of history kept for rewinding
+REWIND_TICKS = 60  # Ticks BACKSPACE rewinds in game
+COMPACT_MIN_DEAD = 64  # Vectorized stores drop dead rows once this many pile up
+CHUNK_WIDTH = 512  # Width of pre-rendered level tiles
+MAX_CACHED_CHUNKS = 16
+MAX_CACHED_TEXTS = 128
+MAX_DIRTY_RECTS = 64  # Beyond this many changed regions a full flip is cheaper
+SOLVER_HOLD = 6  # Ticks each solver action is held for
+SOLVER_CELL = 8  # Player positions closer than this count as the same solver state
+SOLVER_MAX_NODES = 20000  # Solver gives up after expanding this many states
+BENCH_TOLERANCE = 0.10  # Slowdown beyond which --bench-compare reports a regression
+PROFILE_FRAMES = 600  # Frames kept in the profiler's ring buffer
+PROFILE_REFRESH = 30  # Frames between overlay updates
+STREAM_CHUNK_WIDTH = 1024  # Width of the chunks a level file is stored and streamed in
+STREAM_MARGIN = 1  # Chunks kept materialized on each side of the screen
+
+# Vertical coin bob per animation frame, one full cycle
+COIN_BOB = [int(math.sin(i * 0.2) * 3) for i in range(32)]
+
+# Input bits for one simulation tick
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
 
-# Font
-font = pygame.font.SysFont(None, 32)
-small_font = pygame.font.SysFont(None, 24)
+# Rewards reported by SimBatch for bots
+REWARD_COIN = 1
+REWARD_HIT = -10
+REWARD_DEATH = -100
+REWARD_GOAL = 100
+
+class SpatialHash:
+    """Uniform grid that buckets objects by bounding box for broadphase queries.
+    
+    Objects covering more than MAX_CELLS_PER_OBJECT cells, like a level-wide
+    ground strip, go in a short list that every query checks directly instead.
+    """
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.keys = {}   # object -> cells it occupies, None for large objects
+        self.large = {}  # objects too big to bucket
+        self.order = {}  # object -> insertion number, keeps query results in list order
+        self.counter = 0
+    
+    def cell_keys(self, x, y, width, height):
+        size = self.cell_size
+        x0, x1 = int(x // size), int((x + width) // size)
+        y0, y1 = int(y // size), int((y + height) // size)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+    
+    def object_keys(self, obj):
+        """Cells to bucket obj in, or None if it is too large for the grid."""
+        size = self.cell_size
+        columns = int((obj.x + obj.width) // size) - int(obj.x // size) + 1
+        rows = int((obj.y + obj.height) // size) - int(obj.y // size) + 1
+        if columns * rows > MAX_CELLS_PER_OBJECT:
+            return None
+        return self.cell_keys(obj.x, obj.y, obj.width, obj.height)
+    
+    def place(self, obj, keys):
+        self.keys[obj] = keys
+        if keys is None:
+            self.large[obj] = None
+            return
+        for key in keys:
+            self.cells.setdefault(key, []).append(obj)
+    
+    def unplace(self, obj):
+        keys = self.keys.pop(obj)
+        if keys is None:
+            del self.large[obj]
+            return
+        for key in keys:
+            bucket = self.cells[key]
+            bucket.remove(obj)
+            if not bucket:
+                del self.cells[key]
+    
+    def insert(self, obj, order=None):
+        """Add obj, after everything already inserted unless an order number is given."""
+        if order is None:
+            order = self.counter
+        self.order[obj] = order
+        self.counter = max(self.counter, order + 1)
+        self.place(obj, self.object_keys(obj))
+    
+    def remove(self, obj):
+        self.unplace(obj)
+        del self.order[obj]
+    
+    def update(self, obj):
+        # Re-bucket only when the object has crossed into different cells
+        keys = self.object_keys(obj)
+        if keys != self.keys[obj]:
+            self.unplace(obj)
+            self.place(obj, keys)
+    
+    def query(self, x, y, width, height):
+        found = {}
+        cells = self.cells
+        for key in self.cell_keys(x, y, width, height):
+            bucket = cells.get(key)
+            if bucket:
+                for obj in bucket:
+                    found[obj] = None
+        for obj in self.large:
+            if (obj.x <= x + width and obj.x + obj.width >= x and
+                    obj.y <= y + height and obj.y + obj.height >= y):
+                found[obj] = None
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=self.order.__getitem__)
+    
+    def __len__(self):
+        return len(self.keys)
+
+class SortedXIndex:
+    """Objects sorted by left edge for bisect range queries along the level.
+    
+    Objects that move may drift from their sorted slot. Queries widen by the
+    total drift reported through moved(), and the list is re-sorted once that
+    passes REINDEX_DRIFT. Objects wider than the screen are kept aside and
+    checked on every query so they do not widen every search.
+    """
+    def __init__(self, objects=()):
+        self.items = [obj for obj in objects if obj.width <= WIDTH]
+        self.wide = [obj for obj in objects if obj.width > WIDTH]
+        self.max_width = max([obj.width for obj in self.items] + [0])
+        self.resort()
+    
+    def resort(self):
+        self.items.sort(key=attrgetter("x"))
+        self.xs = [obj.x for obj in self.items]
+        self.drift = 0
+    
+    def moved(self, distance):
+        self.drift += distance
+        if self.drift > REINDEX_DRIFT:
+            self.resort()
+    
+    def insert(self, obj):
+        if obj.width > WIDTH:
+            self.wide.append(obj)
+            return
+        i = bisect.bisect_right(self.xs, obj.x)
+        self.xs.insert(i, obj.x)
+        self.items.insert(i, obj)
+        self.max_width = max(self.max_width, obj.width)
+    
+    def remove(self, obj):
+        if obj.width > WIDTH:
+            self.wide.remove(obj)
+            return
+        # obj sits within the drift of its indexed x
+        i = bisect.bisect_left(self.xs, obj.x - self.drift)
+        while self.items[i] is not obj:
+            i += 1
+        del self.xs[i]
+        del self.items[i]
+    
+    def query(self, x0, x1):
+        """Objects overlapping the span [x0, x1], in x order."""
+        lo = bisect.bisect_left(self.xs, x0 - self.max_width - self.drift)
+        hi = bisect.bisect_right(self.xs, x1 + self.drift)
+        found = [obj for obj in self.items[lo:hi] if obj.x < x1 and obj.x + obj.width > x0]
+        for obj in self.wide:
+            if obj.x < x1 and obj.x + obj.width > x0:
+                found.append(obj)
+        return found
+    
+    def __len__(self):
+        return len(self.items) + len(self.wide)
+
+class EntityPool:
+    """Live entities of one kind, stored densely with a free list for reuse.
+    
+    remove() is O(1): the last entity is swapped into the freed slot, so
+    iteration order is not insertion order. Released entities are re-initialized
+    by acquire() instead of allocating new objects, and allocations/reuses
+    count both paths so per-frame allocation can be measured.
+    """
+    def __init__(self, kind, items=()):
+        self.kind = kind
+        self.items = list(items)
+        self.slots = {obj: i for i, obj in enumerate(self.items)}
+        self.free = []
+        self.allocations = 0
+        self.reuses = 0
+    
+    def __iter__(self):
+        return iter(self.items)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def __getitem__(self, i):
+        return self.items[i]
+    
+    def __contains__(self, obj):
+        return obj in self.slots
+    
+    def append(self, obj):
+        self.slots[obj] = len(self.items)
+        self.items.append(obj)
+    
+    def remove(self, obj):
+        i = self.slots.pop(obj)
+        last = self.items.pop()
+        if last is not obj:
+            self.items[i] = last
+            self.slots[last] = i
+    
+    def acquire(self, *args):
+        """A fresh entity built from args, reusing a released one when possible."""
+        if self.free:
+            obj = self.free.pop()
+            obj.__init__(*args)
+            self.reuses += 1
+        else:
+            obj = self.kind(*args)
+            self.allocations += 1
+        return obj
+    
+    def release(self, obj):
+        self.remove(obj)
+        self.free.append(obj)
+    
+    def reclaim(self, obj):
+        """Make a released entity live again as itself, e.g. when a snapshot revives it."""
+        self.free.remove(obj)
+        self.append(obj)
 
 class Player:
     def __init__(self, x, y):
@@ -44,23 +293,26 @@ class Player:
         self.vel_y = 0
         self.jumping = False
         self.direction = 1  # 1 for right, -1 for left
-        self.animation_counter = 0
         self.invincible = 0
         self.lives = 3
         self.coins = 0
         self.active = True
+        self.prev_x, self.prev_y = x, y  # Position before the last move, for interpolation
         
-    def move(self, dx, platforms, enemies, coins):
+    def move(self, dx, level):
+        self.prev_x, self.prev_y = self.x, self.y
         if not self.active:
             return
             
         # Move horizontally
+        old_x = self.x
         self.x += dx
         if dx != 0:
             self.direction = 1 if dx > 0 else -1
         
-        # Check collisions with platforms
-        for platform in platforms:
+        # Check collisions with platforms swept by the horizontal move
+        left = min(old_x, self.x)
+        for platform in level.platforms_near(left, self.y, self.width + abs(dx), self.height):
             if self.collision(platform):
                 if dx > 0:  # Moving right
                     self.x = platform.x - self.width
@@ -72,7 +324,7 @@ class Player:
         self.y += self.vel_y
         
         # Check collisions with platforms vertically
-        for platform in platforms:
+        for platform in level.platforms_near(self.x, self.y, self.width, self.height):
             if self.collision(platform):
                 if self.vel_y > 0:  # Falling
                     self.y = platform.y - self.height
@@ -83,11 +335,11 @@ class Player:
                     self.vel_y = 0
         
         # Check collisions with enemies
-        for enemy in enemies:
+        for enemy in level.enemies_near(self.x, self.y, self.width, self.height):
             if self.collision(enemy):
                 if self.vel_y > 0 and self.y + self.height < enemy.y + enemy.height/2:
                     # Jump on enemy
-                    enemy.active = False
+                    level.kill_enemy(enemy)
                     self.vel_y = -JUMP_STRENGTH * 0.7
                     self.coins += 1
                 elif self.invincible <= 0:
@@ -98,9 +350,9 @@ class Player:
                         self.active = False
         
         # Check collisions with coins
-        for coin in coins[:]:
+        for coin in level.coins_near(self.x, self.y, self.width, self.height):
             if self.collision(coin):
-                coins.remove(coin)
+                level.collect_coin(coin)
                 self.coins += 1
     
     def collision(self, obj):
@@ -114,34 +366,42 @@ class Player:
             self.vel_y = -JUMP_STRENGTH
             self.jumping = True
     
-    def draw(self, screen, scroll_x):
+    def position(self, alpha=1.0):
+        """Where to draw the player, alpha of the way from the previous tick's position."""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+    
+    def draw(self, screen, scroll_x, atlas=None, alpha=1.0, tick=0):
         if not self.active:
             return
             
-        if self.invincible > 0:
-            if self.invincible % 6 < 3:  # Flashing effect
-                return
-            self.invincible -= 1
+        if self.invincible > 0 and self.invincible % 6 < 3:  # Flashing effect
+            return
+        
+        # Animation - legs, driven by the simulation tick so it keeps pace whatever the frame rate
+        leg_offset = int(math.sin(tick * 0.5) * 3) if abs(self.vel_y) < 0.1 else 0
         
+        x, y = self.position(alpha)
+        x_pos = x - scroll_x
+        if atlas is None or not atlas.blit(screen, ("player", leg_offset), x_pos, y):
+            self.draw_frame(screen, x_pos, y, leg_offset)
+    
+    def draw_frame(self, screen, x_pos, y, leg_offset):
         # Draw Mario
-        x_pos = self.x - scroll_x
         
         # Body
-        pygame.draw.rect(screen, RED, (x_pos + 4, self.y + 8, self.width - 8, self.height - 8))
+        pygame.draw.rect(screen, RED, (x_pos + 4, y + 8, self.width - 8, self.height - 8))
         
         # Head
-        pygame.draw.rect(screen, (255, 200, 150), (x_pos + 4, self.y, self.width - 8, 12))
+        pygame.draw.rect(screen, (255, 200, 150), (x_pos + 4, y, self.width - 8, 12))
         
         # Hat
-        pygame.draw.rect(screen, RED, (x_pos + 2, self.y - 4, self.width - 4, 8))
-        pygame.draw.rect(screen, RED, (x_pos, self.y + 4, self.width, 4))
-        
-        # Animation - legs
-        leg_offset = math.sin(self.animation_counter * 0.5) * 3 if abs(self.vel_y) < 0.1 else 0
-        pygame.draw.rect(screen, BLUE, (x_pos + 4, self.y + self.height - 8, 6, 8))
-        pygame.draw.rect(screen, BLUE, (x_pos + self.width - 10, self.y + self.height - 8 + leg_offset, 6, 8))
+        pygame.draw.rect(screen, RED, (x_pos + 2, y - 4, self.width - 4, 8))
+        pygame.draw.rect(screen, RED, (x_pos, y + 4, self.width, 4))
         
-        self.animation_counter += 1
+        # Legs
+        pygame.draw.rect(screen, BLUE, (x_pos + 4, y + self.height - 8, 6, 8))
+        pygame.draw.rect(screen, BLUE, (x_pos + self.width - 10, y + self.height - 8 + leg_offset, 6, 8))
 
 class Platform:
     def __init__(self, x, y, width, height, color=BROWN):
@@ -155,10 +415,14 @@ class Platform:
         pygame.draw.rect(screen, self.color, (self.x - scroll_x, self.y, self.width, self.height))
         # Draw platform details
         pygame.draw.rect(screen, (139, 69, 19), (self.x - scroll_x, self.y, self.width, 4))
-        for i in range(int(self.width / 20)):
+        # Only draw the plank lines that land on the target surface
+        left = self.x - scroll_x
+        first = max(0, math.ceil((-2 - left) / 20))
+        last = min(int(self.width / 20), math.floor((screen.get_width() + 2 - left) / 20) + 1)
+        for i in range(first, last):
             pygame.draw.line(screen, (101, 67, 33), 
-                            (self.x - scroll_x + i*20, self.y + 4),
-                            (self.x - scroll_x + i*20, self.y + self.height), 2)
+                            (left + i*20, self.y + 4),
+                            (left + i*20, self.y + self.height), 2)
 
 class Enemy:
     def __init__(self, x, y, width=24, height=20):
@@ -169,8 +433,10 @@ class Enemy:
         self.direction = -1
         self.speed = 1
         self.active = True
+        self.prev_x = x  # Position before the last move, for interpolation
     
-    def move(self, platforms):
+    def move(self, level):
+        self.prev_x = self.x
         if not self.active:
             return
             
@@ -178,11 +444,12 @@ class Enemy:
         
         # Change direction if at edge or hitting wall
         on_ground = False
-        for platform in platforms:
+        feet = self.y + self.height
+        for platform in level.platforms_near(self.x, feet - 5, self.width, 10):
             # Check if enemy is on a platform
             if (self.x + self.width > platform.x and 
                 self.x < platform.x + platform.width and
-                abs((self.y + self.height) - platform.y) < 5):
+                abs(feet - platform.y) < 5):
                 on_ground = True
                 
                 # Check if at edge
@@ -194,26 +461,35 @@ class Enemy:
         if not on_ground:
             self.direction *= -1
     
-    def draw(self, screen, scroll_x):
+    def position(self, alpha=1.0):
+        """Where to draw the enemy along x, alpha of the way from the previous tick's position."""
+        return self.prev_x + (self.x - self.prev_x) * alpha
+    
+    def draw(self, screen, scroll_x, atlas=None, alpha=1.0):
         if not self.active:
             return
             
-        x_pos = self.x - scroll_x
-        
+        x_pos = self.position(alpha) - scroll_x
+        direction = 1 if self.direction > 0 else -1
+        key = ("enemy", self.width, self.height, direction)
+        if atlas is None or not atlas.blit(screen, key, x_pos, self.y):
+            self.draw_frame(screen, x_pos, self.y, direction)
+    
+    def draw_frame(self, screen, x_pos, y, direction):
         # Draw Goomba
-        pygame.draw.ellipse(screen, BROWN, (x_pos, self.y, self.width, self.height))
-        pygame.draw.ellipse(screen, (101, 67, 33), (x_pos, self.y, self.width, self.height/2))
+        pygame.draw.ellipse(screen, BROWN, (x_pos, y, self.width, self.height))
+        pygame.draw.ellipse(screen, (101, 67, 33), (x_pos, y, self.width, self.height/2))
         
         # Eyes
-        eye_offset = 4 if self.direction > 0 else -4
-        pygame.draw.circle(screen, WHITE, (x_pos + 8 + eye_offset, self.y + 8), 4)
-        pygame.draw.circle(screen, WHITE, (x_pos + self.width - 8 + eye_offset, self.y + 8), 4)
-        pygame.draw.circle(screen, BLACK, (x_pos + 8 + eye_offset, self.y + 8), 2)
-        pygame.draw.circle(screen, BLACK, (x_pos + self.width - 8 + eye_offset, self.y + 8), 2)
+        eye_offset = 4 if direction > 0 else -4
+        pygame.draw.circle(screen, WHITE, (x_pos + 8 + eye_offset, y + 8), 4)
+        pygame.draw.circle(screen, WHITE, (x_pos + self.width - 8 + eye_offset, y + 8), 4)
+        pygame.draw.circle(screen, BLACK, (x_pos + 8 + eye_offset, y + 8), 2)
+        pygame.draw.circle(screen, BLACK, (x_pos + self.width - 8 + eye_offset, y + 8), 2)
         
         # Feet
-        pygame.draw.ellipse(screen, (101, 67, 33), (x_pos + 2, self.y + self.height - 6, 8, 6))
-        pygame.draw.ellipse(screen, (101, 67, 33), (x_pos + self.width - 10, self.y + self.height - 6, 8, 6))
+        pygame.draw.ellipse(screen, (101, 67, 33), (x_pos + 2, y + self.height - 6, 8, 6))
+        pygame.draw.ellipse(screen, (101, 67, 33), (x_pos + self.width - 10, y + self.height - 6, 8, 6))
 
 class Coin:
     def __init__(self, x, y):
@@ -221,16 +497,19 @@ class Coin:
         self.y = y
         self.width = 12
         self.height = 12
-        self.animation_counter = 0
+        self.active = True
     
-    def draw(self, screen, scroll_x):
-        self.animation_counter += 0.2
-        y_offset = math.sin(self.animation_counter) * 3
-        
+    def draw(self, screen, scroll_x, atlas=None, tick=0):
+        phase = tick % len(COIN_BOB)  # Bob with the simulation tick, not the frame rate
+        x_pos = self.x - scroll_x
+        if atlas is None or not atlas.blit(screen, ("coin", phase), x_pos, self.y):
+            self.draw_frame(screen, x_pos, self.y + COIN_BOB[phase])
+    
+    def draw_frame(self, screen, x_pos, y):
         # Draw coin
-        pygame.draw.circle(screen, YELLOW, (self.x - scroll_x + self.width//2, self.y + y_offset + self.height//2), 6)
-        pygame.draw.circle(screen, (255, 223, 0), (self.x - scroll_x + self.width//2, self.y + y_offset + self.height//2), 4)
-        pygame.draw.circle(screen, (255, 239, 0), (self.x - scroll_x + self.width//2, self.y + y_offset + self.height//2), 2)
+        pygame.draw.circle(screen, YELLOW, (x_pos + self.width//2, y + self.height//2), 6)
+        pygame.draw.circle(screen, (255, 223, 0), (x_pos + self.width//2, y + self.height//2), 4)
+        pygame.draw.circle(screen, (255, 239, 0), (x_pos + self.width//2, y + self.height//2), 2)
 
 class Goal:
     def __init__(self, x, y):
@@ -250,15 +529,172 @@ class Goal:
             (self.x - scroll_x + 30, self.y + 20)
         ])
 
+def store_field(name, cast):
+    """Property that reads and writes one row of an EntityStore array."""
+    def get(self):
+        return cast(getattr(self.store, name)[self.index])
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+    return property(get, set)
+
+class EntityStore:
+    """Struct-of-arrays state for a batch of enemies or coins.
+    
+    Positions, sizes, direction, speed and an active mask live in NumPy arrays
+    so patrol movement and overlap tests run as a handful of array operations
+    instead of a Python call per entity.
+    """
+    def __init__(self, entities, ids=None):
+        # Snapshot ids, the entities' broadphase insertion numbers; they survive compact()
+        self.id = np.array(range(len(entities)) if ids is None else ids, dtype=np.int64)
+        self.x = np.array([e.x for e in entities], dtype=np.float64)
+        self.prev_x = self.x.copy()  # x before the last patrol(), for interpolation
+        self.y = np.array([e.y for e in entities], dtype=np.float64)
+        self.width = np.array([e.width for e in entities], dtype=np.float64)
+        self.height = np.array([e.height for e in entities], dtype=np.float64)
+        self.direction = np.array([getattr(e, "direction", 0) for e in entities], dtype=np.int64)
+        self.speed = np.array([getattr(e, "speed", 0) for e in entities], dtype=np.float64)
+        self.active = np.array([e.active for e in entities], dtype=bool)
+        self.dead = 0  # Inactive rows waiting for compact()
+        
+        # Platforms each entity can stand on, padded to a common column count
+        self.support_left = np.zeros((len(entities), 0))
+        self.support_right = np.zeros((len(entities), 0))
+        self.support_valid = np.zeros((len(entities), 0), dtype=bool)
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def attach_supports(self, platforms):
+        """Precompute the platforms each entity may stand on while it patrols.
+        
+        Entities never change height, so each one only ever touches platforms at
+        its feet within the run of nearly touching platforms it starts on.
+        """
+        count = len(self)
+        supports = [[] for _ in range(count)]
+        if count:
+            feet = self.y + self.height
+            gap = float(self.width.max() + self.speed.max() + 1)
+            for level_y in np.unique(feet):
+                band = [i for i, p in enumerate(platforms) if abs(level_y - p.y) < 5]
+                if not band:
+                    continue
+                # Merge the band into runs separated by gaps no entity can straddle
+                band.sort(key=lambda i: platforms[i].x)
+                runs = []  # [left, right, platform indices]
+                for i in band:
+                    platform = platforms[i]
+                    if runs and platform.x <= runs[-1][1] + gap:
+                        runs[-1][1] = max(runs[-1][1], platform.x + platform.width)
+                        runs[-1][2].append(i)
+                    else:
+                        runs.append([platform.x, platform.x + platform.width, [i]])
+                lefts = [run[0] for run in runs]
+                for e in np.flatnonzero(feet == level_y):
+                    r = bisect.bisect_left(lefts, self.x[e] + self.width[e]) - 1
+                    if r >= 0 and self.x[e] < runs[r][1] + gap:
+                        supports[e] = sorted(runs[r][2])  # Keep list order, as Enemy.move does
+        
+        columns = max([len(row) for row in supports] + [1])
+        self.support_left = np.zeros((count, columns))
+        self.support_right = np.zeros((count, columns))
+        self.support_valid = np.zeros((count, columns), dtype=bool)
+        for e, row in enumerate(supports):
+            for k, i in enumerate(row):
+                self.support_left[e, k] = platforms[i].x
+                self.support_right[e, k] = platforms[i].x + platforms[i].width
+                self.support_valid[e, k] = True
+    
+    def patrol(self, window=None):
+        """Advance active entities one tick with the same rules as Enemy.move.
+        
+        With a (left, right) window, only entities overlapping it move.
+        """
+        active = self.active
+        if window is not None:
+            active = active & (self.x + self.width > window[0]) & (self.x < window[1])
+        self.prev_x = self.x.copy()
+        self.x += np.where(active, self.direction * self.speed, 0)
+        x, right = self.x, self.x + self.width
+        direction = self.direction
+        on_ground = np.zeros(len(self), dtype=bool)
+        # Columns are visited in platform order so flips compound exactly like the loop
+        for k in range(self.support_left.shape[1]):
+            left_edge = self.support_left[:, k]
+            right_edge = self.support_right[:, k]
+            over = active & self.support_valid[:, k] & (right > left_edge) & (x < right_edge)
+            on_ground |= over
+            at_edge = over & (((direction == -1) & (x <= left_edge)) |
+                              ((direction == 1) & (right >= right_edge)))
+            direction = np.where(at_edge, -direction, direction)
+        self.direction = np.where(active & ~on_ground, -direction, direction)
+    
+    def pack(self, fields):
+        """Live rows as packed records of the given (name, format) fields, in row order.
+        
+        Returns (count, bytes); the layout matches a struct of the same formats.
+        """
+        live = self.active
+        records = np.empty(np.count_nonzero(live), np.dtype(list(fields)))
+        for name, _ in fields:
+            records[name] = getattr(self, name)[live]
+        return len(records), records.tobytes()
+    
+    def compact(self):
+        """Keep only active rows, preserving their order."""
+        keep = self.active
+        for name in ("id", "x", "prev_x", "y", "width", "height", "direction", "speed", "active",
+                     "support_left", "support_right", "support_valid"):
+            setattr(self, name, getattr(self, name)[keep])
+        self.dead = 0
+    
+    def overlapping(self, x, y, width, height):
+        """Indices of active entities whose box overlaps the given one, in list order."""
+        return np.flatnonzero(self.active &
+                              (self.x < x + width) & (self.x + self.width > x) &
+                              (self.y < y + height) & (self.y + self.height > y))
+
+class EnemyView(Enemy):
+    """An Enemy whose state is one row of an EntityStore."""
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+    
+    x = store_field("x", float)
+    prev_x = store_field("prev_x", float)
+    y = store_field("y", float)
+    width = store_field("width", int)
+    height = store_field("height", int)
+    direction = store_field("direction", int)
+    speed = store_field("speed", float)
+    active = store_field("active", bool)
+
+class CoinView(Coin):
+    """A Coin whose position is one row of an EntityStore."""
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+    
+    x = store_field("x", float)
+    y = store_field("y", float)
+    width = store_field("width", int)
+    height = store_field("height", int)
+    active = store_field("active", bool)
+
 class Level:
     def __init__(self, level_num):
         self.level_num = level_num
         self.platforms = []
-        self.enemies = []
-        self.coins = []
+        self.enemies = EntityPool(Enemy)
+        self.coins = EntityPool(Coin)
         self.goal = None
         self.level_width = 2000
         self.player_start = (50, 300)
+        self.enemy_store = None  # Set by vectorize()
+        self.coin_store = None
+        self.sleep_margin = None  # Enemies further than this off screen skip their update
+        self.view_x = 0
         
         # Create level based on level number
         if level_num == 1:
@@ -267,6 +703,318 @@ class Level:
             self.create_level_2()
         elif level_num == 3:
             self.create_level_3()
+        
+        self.build_index()
+    
+    @classmethod
+    def generate(cls, level_width, seed=0, enemies=None, platforms=None, coins=None):
+        """Build a random level of any width, used for stress testing and benchmarks.
+        
+        By default a platform sits every 250 px with a coin above it and an
+        enemy on or below it. Pass platforms to spread exactly that many evenly
+        instead, and enemies or coins to scatter that many along the ground.
+        """
+        level = cls(0)
+        level.level_width = level_width
+        rng = random.Random(seed)
+        
+        level.platforms.append(Platform(0, HEIGHT - 40, level_width, 40, GROUND_GREEN))
+        if platforms is None:
+            slots = range(200, level_width - 300, 250)
+        else:
+            slots = [200 + (level_width - 500) * i // platforms for i in range(platforms)]
+        for x in slots:
+            width = rng.randrange(80, 160, 20)
+            y = rng.randrange(180, 320, 20)
+            level.platforms.append(Platform(x, y, width, 20))
+            if coins is None:
+                level.coins.append(Coin(x + width // 2 - 6, y - 50))
+            if enemies is not None:
+                continue
+            if rng.random() < 0.5:
+                level.enemies.append(Enemy(x + width // 2, y - 20))
+            else:
+                level.enemies.append(Enemy(x + 100, HEIGHT - 60))
+        
+        for _ in range(enemies or 0):
+            level.enemies.append(Enemy(rng.randrange(300, level_width - 300), HEIGHT - 60))
+        for _ in range(coins or 0):
+            level.coins.append(Coin(rng.randrange(300, level_width - 300),
+                                    rng.randrange(HEIGHT - 140, HEIGHT - 70)))
+        
+        level.goal = Goal(level_width - 200, HEIGHT - 100)
+        level.build_index()
+        return level
+    
+    def build_index(self):
+        # Static platforms and coins are bucketed once; enemies are re-bucketed as they move
+        self.platform_index = SpatialHash()
+        for platform in self.platforms:
+            self.platform_index.insert(platform)
+        self.build_entity_index()
+    
+    def build_entity_index(self, coin_ids=None, enemy_ids=None):
+        # Entities keep their ids, the broadphase insertion numbers, after they die
+        # so restore_entities() can revive them
+        self.coin_index = SpatialHash()
+        self.known_coins = {}  # id -> coin
+        for i, coin in enumerate(self.coins):
+            self.coin_index.insert(coin, None if coin_ids is None else coin_ids[i])
+            self.known_coins[self.coin_index.order[coin]] = coin
+        self.enemy_index = SpatialHash()
+        self.known_enemies = {}  # id -> enemy
+        for i, enemy in enumerate(self.enemies):
+            if enemy.active:
+                self.enemy_index.insert(enemy, None if enemy_ids is None else enemy_ids[i])
+                self.known_enemies[self.enemy_index.order[enemy]] = enemy
+        self.build_x_index()
+    
+    def build_x_index(self):
+        # x-sorted views of coins and live enemies for culling and sleeping
+        self.coin_xs = SortedXIndex([coin for coin in self.coins if coin.active])
+        self.enemy_xs = SortedXIndex([enemy for enemy in self.enemies if enemy.active])
+        self.enemy_max_speed = max([enemy.speed for enemy in self.enemies] + [0])
+    
+    def vectorize(self):
+        """Move enemy and coin state into NumPy arrays and update it in batches.
+        
+        Level.enemies and Level.coins become views onto the arrays, so drawing
+        and Player.move work unchanged.
+        """
+        if np is None:
+            raise RuntimeError("vectorized levels need numpy")
+        # Rows go in id order, the order collisions and snapshots visit them
+        enemies = sorted(self.enemies, key=self.enemy_index.order.__getitem__)
+        coins = sorted(self.coins, key=self.coin_index.order.__getitem__)
+        self.enemy_store = EntityStore(enemies, [self.enemy_index.order[e] for e in enemies])
+        self.enemy_store.attach_supports(self.platforms)
+        self.enemies = EntityPool(EnemyView, [EnemyView(self.enemy_store, i)
+                                              for i in range(len(enemies))])
+        self.coin_store = EntityStore(coins, [self.coin_index.order[c] for c in coins])
+        self.coins = EntityPool(CoinView, [CoinView(self.coin_store, i)
+                                           for i in range(len(coins))])
+        self.build_x_index()
+        return self
+    
+    def ordered_entities(self):
+        """Live enemies and coins as (id, entity) pairs in the order collisions visit them.
+        
+        Pools reorder on removal, so this follows the broadphase insertion
+        order instead, which is what restore_entities() needs to reproduce a
+        tick. Vectorized stores carry the same ids in a column, so a level
+        snapshots identically in either mode.
+        """
+        if self.enemy_store is not None:
+            enemy_ids, coin_ids = self.enemy_store.id, self.coin_store.id
+            return (sorted([(int(enemy_ids[e.index]), e) for e in self.enemies if e.active]),
+                    sorted([(int(coin_ids[c.index]), c) for c in self.coins if c.active]))
+        enemy_order, coin_order = self.enemy_index.order, self.coin_index.order
+        return (sorted([(enemy_order[enemy], enemy) for enemy in self.enemies]),
+                sorted([(coin_order[coin], coin) for coin in self.coins]))
+    
+    def pack_entities(self):
+        """Snapshot records of the live entities: (enemy count, enemy bytes, coin count, coin bytes)."""
+        if self.enemy_store is not None:
+            return (*self.enemy_store.pack(SNAPSHOT_ENEMY_FIELDS),
+                    *self.coin_store.pack(SNAPSHOT_COIN_FIELDS))
+        enemies, coins = self.ordered_entities()
+        pack_enemy, pack_coin = SNAPSHOT_ENEMY.pack, SNAPSHOT_COIN.pack
+        return (len(enemies),
+                b"".join([pack_enemy(i, e.x, e.y, e.width, e.height, e.direction, e.speed)
+                          for i, e in enemies]),
+                len(coins),
+                b"".join([pack_coin(i, c.x, c.y) for i, c in coins]))
+    
+    def set_entities(self, enemies, coins, enemy_ids=None, coin_ids=None):
+        """Replace every enemy and coin, keeping the platforms and their index."""
+        vectorized = self.enemy_store is not None
+        self.enemies = EntityPool(Enemy, enemies)
+        self.coins = EntityPool(Coin, coins)
+        self.enemy_store = self.coin_store = None
+        self.build_entity_index(coin_ids, enemy_ids)
+        if vectorized:
+            self.vectorize()
+    
+    def restore_entities(self, enemies, coins):
+        """Bring enemies and coins to the state a snapshot recorded.
+        
+        enemies holds (id, x, y, width, height, direction, speed) and coins
+        (id, x, y), both in id order. When every id names an
+        entity this level has indexed, entities are moved, killed or revived
+        in place, which keeps their broadphase buckets; otherwise the entity
+        indexes are rebuilt from the records.
+        """
+        known_enemies, known_coins = self.known_enemies, self.known_coins
+        if (self.enemy_store is not None
+                or any(record[0] not in known_enemies for record in enemies)
+                or any(record[0] not in known_coins for record in coins)):
+            self.rebuild_entities(enemies, coins)
+            return
+        
+        wanted = {record[0] for record in enemies}
+        for enemy in list(self.enemies):
+            if self.enemy_index.order[enemy] not in wanted:
+                self.kill_enemy(enemy)
+        drift = 0
+        for enemy_id, x, y, width, height, direction, speed in enemies:
+            enemy = known_enemies[enemy_id]
+            drift = max(drift, abs(enemy.x - x))
+            enemy.x, enemy.y, enemy.width, enemy.height = x, y, width, height
+            enemy.prev_x = x
+            enemy.direction, enemy.speed = direction, speed
+            if enemy.active:
+                self.enemy_index.update(enemy)
+            else:
+                enemy.active = True
+                self.enemies.reclaim(enemy)
+                self.enemy_index.insert(enemy, enemy_id)
+                self.enemy_xs.insert(enemy)
+        self.enemy_xs.moved(drift)
+        
+        wanted = {record[0] for record in coins}
+        for coin in list(self.coins):
+            if self.coin_index.order[coin] not in wanted:
+                self.collect_coin(coin)
+        for coin_id, x, y in coins:
+            coin = known_coins[coin_id]
+            if not coin.active:
+                coin.x, coin.y, coin.active = x, y, True
+                self.coins.reclaim(coin)
+                self.coin_index.insert(coin, coin_id)
+                self.coin_xs.insert(coin)
+    
+    def rebuild_entities(self, enemies, coins):
+        enemy_objects = []
+        for enemy_id, x, y, width, height, direction, speed in enemies:
+            enemy = Enemy(x, y, width, height)
+            enemy.direction, enemy.speed = direction, speed
+            enemy_objects.append(enemy)
+        coin_objects = []
+        for coin_id, x, y in coins:
+            coin_objects.append(Coin(x, y))
+        self.set_entities(enemy_objects, coin_objects,
+                          [record[0] for record in enemies], [record[0] for record in coins])
+    
+    def compact(self):
+        """Drop dead rows from the vectorized stores once enough have piled up.
+        
+        Surviving views are renumbered in place, so references to them stay valid.
+        """
+        for store, pool_name in ((self.enemy_store, "enemies"), (self.coin_store, "coins")):
+            if store is None or store.dead < max(COMPACT_MIN_DEAD, len(store) // 4):
+                continue
+            pool = getattr(self, pool_name)
+            survivors = [view for view in pool if store.active[view.index]]
+            store.compact()
+            for i, view in enumerate(survivors):
+                view.index = i
+            setattr(self, pool_name, EntityPool(pool.kind, survivors))
+    
+    def platforms_near(self, x, y, width, height):
+        return self.platform_index.query(x, y, width, height)
+    
+    def enemies_near(self, x, y, width, height):
+        if self.enemy_store is not None:
+            return [self.enemies[i] for i in self.enemy_store.overlapping(x, y, width, height)]
+        return self.enemy_index.query(x, y, width, height)
+    
+    def coins_near(self, x, y, width, height):
+        if self.coin_store is not None:
+            return [self.coins[i] for i in self.coin_store.overlapping(x, y, width, height)]
+        return self.coin_index.query(x, y, width, height)
+    
+    def visible_enemies(self, x0, x1):
+        return self.enemy_xs.query(x0, x1)
+    
+    def visible_coins(self, x0, x1):
+        return self.coin_xs.query(x0, x1)
+    
+    def kill_enemy(self, enemy):
+        self.enemy_xs.remove(enemy)
+        enemy.active = False
+        if self.enemy_store is None:
+            self.enemy_index.remove(enemy)
+            self.enemies.release(enemy)
+        else:
+            self.enemy_store.dead += 1
+    
+    def collect_coin(self, coin):
+        self.coin_xs.remove(coin)
+        coin.active = False
+        if self.coin_store is None:
+            self.coin_index.remove(coin)
+            self.coins.release(coin)
+        else:
+            self.coin_store.dead += 1
+    
+    def update_window(self, scroll_x):
+        """Called each tick with the camera position.
+        
+        Subclasses that keep only part of the level in memory extend this.
+        """
+        self.view_x = scroll_x
+    
+    def close(self):
+        """Release anything held open for the level; built levels hold nothing."""
+    
+    def add_platform(self, platform):
+        self.platforms.append(platform)
+        self.platform_index.insert(platform)
+    
+    def remove_platform(self, platform):
+        self.platforms.remove(platform)
+        self.platform_index.remove(platform)
+    
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        if enemy.active:
+            self.enemy_index.insert(enemy)
+            self.known_enemies[self.enemy_index.order[enemy]] = enemy
+            self.enemy_xs.insert(enemy)
+            self.enemy_max_speed = max(self.enemy_max_speed, enemy.speed)
+    
+    def remove_enemy(self, enemy):
+        self.enemies.release(enemy)
+        if enemy.active:
+            del self.known_enemies[self.enemy_index.order[enemy]]
+            self.enemy_index.remove(enemy)
+            self.enemy_xs.remove(enemy)
+    
+    def add_coin(self, coin):
+        self.coins.append(coin)
+        self.coin_index.insert(coin)
+        self.known_coins[self.coin_index.order[coin]] = coin
+        self.coin_xs.insert(coin)
+    
+    def remove_coin(self, coin):
+        self.coins.release(coin)
+        del self.known_coins[self.coin_index.order[coin]]
+        self.coin_index.remove(coin)
+        self.coin_xs.remove(coin)
+    
+    def allocations(self):
+        """Enemy and coin objects created so far, excluding reuse from the pools."""
+        return self.enemies.allocations + self.coins.allocations
+    
+    def update_enemies(self):
+        if self.sleep_margin is None:
+            awake = None
+        else:
+            awake = (self.view_x - self.sleep_margin, self.view_x + WIDTH + self.sleep_margin)
+        
+        if self.enemy_store is not None:
+            self.compact()
+            self.enemy_store.patrol(awake)
+        elif awake is None:
+            for enemy in self.enemies:
+                if enemy.active:
+                    enemy.move(self)
+                    self.enemy_index.update(enemy)
+        else:
+            for enemy in self.enemy_xs.query(*awake):
+                enemy.move(self)
+                self.enemy_index.update(enemy)
+        self.enemy_xs.moved(self.enemy_max_speed)
     
     def create_level_1(self):
         # Ground
@@ -347,242 +1095,1884 @@ class Level:
         # Goal
         self.goal = Goal(1900, 120)
 
-class Game:
+# On-disk level format, all little-endian:
+#   header     magic, version, level width, chunk width, start x/y, goal x/y, chunk count
+#   directory  per chunk: file offset and platform/enemy/coin record counts
+#   chunks     records for everything overlapping the chunk; platforms that span
+#              several chunks are repeated in each, under the same id
+LEVEL_MAGIC = b"SMLV"
+LEVEL_VERSION = 1
+LEVEL_HEADER = struct.Struct("<4sHIIiiiiI")
+LEVEL_CHUNK_ENTRY = struct.Struct("<IHHH")
+LEVEL_PLATFORM = struct.Struct("<IiiIH3B")
+LEVEL_ENEMY = struct.Struct("<IiiBB")
+LEVEL_COIN = struct.Struct("<Iii")
+
+def save_level(level, path, chunk_width=STREAM_CHUNK_WIDTH):
+    """Write any Level to the chunked on-disk format read by StreamedLevel."""
+    chunk_count = max(1, -(-level.level_width // chunk_width))
+    chunks = [([], [], []) for _ in range(chunk_count)]
+    
+    def chunk_range(x, width):
+        first = max(0, int(x) // chunk_width)
+        last = min(chunk_count - 1, int(x + width - 1) // chunk_width)
+        return range(first, last + 1)
+    
+    for i, platform in enumerate(level.platforms):
+        record = LEVEL_PLATFORM.pack(i, int(platform.x), int(platform.y), int(platform.width),
+                                     int(platform.height), *platform.color)
+        for index in chunk_range(platform.x, platform.width):
+            chunks[index][0].append(record)
+    # Enemies and coins belong to the chunk they start in
+    for i, enemy in enumerate(level.enemies):
+        index = chunk_range(enemy.x, 1)[0]
+        chunks[index][1].append(LEVEL_ENEMY.pack(i, int(enemy.x), int(enemy.y),
+                                                 int(enemy.width), int(enemy.height)))
+    for i, coin in enumerate(level.coins):
+        index = chunk_range(coin.x, 1)[0]
+        chunks[index][2].append(LEVEL_COIN.pack(i, int(coin.x), int(coin.y)))
+    
+    goal = level.goal
+    offset = LEVEL_HEADER.size + LEVEL_CHUNK_ENTRY.size * chunk_count
+    with open(path, "wb") as f:
+        f.write(LEVEL_HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, level.level_width, chunk_width,
+                                  int(level.player_start[0]), int(level.player_start[1]),
+                                  int(goal.x), int(goal.y), chunk_count))
+        for platforms, enemies, coins in chunks:
+            f.write(LEVEL_CHUNK_ENTRY.pack(offset, len(platforms), len(enemies), len(coins)))
+            offset += sum(len(record) for record in platforms + enemies + coins)
+        for platforms, enemies, coins in chunks:
+            f.write(b"".join(platforms + enemies + coins))
+
+class StreamedLevel(Level):
+    """A level read from disk chunk by chunk as the screen scrolls.
+    
+    Opening the file only reads the header and chunk directory. Entities are
+    materialized for chunks within STREAM_MARGIN of the screen and dropped when
+    they fall out of that window, so memory stays bounded however wide the
+    level is. Collected coins and stomped enemies are remembered by id and not
+    brought back. Enemies start patrolling when their chunk is first
+    materialized and belong to whichever chunk they have walked into, so they
+    are evicted with the ground under them; those evicted alive respawn at
+    their start when their own chunk is next loaded.
+    """
+    def __init__(self, path, margin=STREAM_MARGIN):
+        super().__init__(0)
+        self.file = open(path, "rb")
+        (magic, version, self.level_width, self.chunk_width, start_x, start_y,
+         goal_x, goal_y, chunk_count) = LEVEL_HEADER.unpack(self.file.read(LEVEL_HEADER.size))
+        if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+            raise ValueError(f"{path} is not a level file this game can read")
+        self.directory = list(LEVEL_CHUNK_ENTRY.iter_unpack(
+            self.file.read(LEVEL_CHUNK_ENTRY.size * chunk_count)))
+        self.player_start = (start_x, start_y)
+        self.goal = Goal(goal_x, goal_y)
+        self.margin = margin
+        
+        self.loaded = {}  # chunk index -> (platform ids, enemies, coins)
+        self.platform_refs = {}  # platform id -> [platform, number of loaded chunks using it]
+        self.ids = {}  # materialized enemy or coin -> (record id, chunk index it is in)
+        self.live_enemies = set()  # Record ids of materialized enemies, wherever they walked
+        self.consumed = set()  # ("enemy" | "coin", id) that must not respawn
+        self.window = None
+    
+    def read_chunk(self, index):
+        offset, platform_count, enemy_count, coin_count = self.directory[index]
+        self.file.seek(offset)
+        data = self.file.read(platform_count * LEVEL_PLATFORM.size +
+                              enemy_count * LEVEL_ENEMY.size + coin_count * LEVEL_COIN.size)
+        end = platform_count * LEVEL_PLATFORM.size
+        platforms = list(LEVEL_PLATFORM.iter_unpack(data[:end]))
+        start, end = end, end + enemy_count * LEVEL_ENEMY.size
+        enemies = list(LEVEL_ENEMY.iter_unpack(data[start:end]))
+        coins = list(LEVEL_COIN.iter_unpack(data[end:]))
+        return platforms, enemies, coins
+    
+    def materialize(self, index):
+        platform_records, enemy_records, coin_records = self.read_chunk(index)
+        platform_ids, enemies, coins = [], {}, {}
+        for record_id, x, y, width, height, r, g, b in platform_records:
+            ref = self.platform_refs.get(record_id)
+            if ref is None:
+                ref = self.platform_refs[record_id] = [Platform(x, y, width, height, (r, g, b)), 0]
+                self.add_platform(ref[0])
+            ref[1] += 1
+            platform_ids.append(record_id)
+        for record_id, x, y, width, height in enemy_records:
+            if ("enemy", record_id) not in self.consumed and record_id not in self.live_enemies:
+                enemy = self.enemies.acquire(x, y, width, height)
+                self.ids[enemy] = (record_id, index)
+                self.live_enemies.add(record_id)
+                self.add_enemy(enemy)
+                enemies[enemy] = None
+        for record_id, x, y in coin_records:
+            if ("coin", record_id) not in self.consumed:
+                coin = self.coins.acquire(x, y)
+                self.ids[coin] = (record_id, index)
+                self.add_coin(coin)
+                coins[coin] = None
+        self.loaded[index] = (platform_ids, enemies, coins)
+    
+    def evict(self, index):
+        platform_ids, enemies, coins = self.loaded.pop(index)
+        for record_id in platform_ids:
+            ref = self.platform_refs[record_id]
+            ref[1] -= 1
+            if not ref[1]:
+                del self.platform_refs[record_id]
+                self.remove_platform(ref[0])
+        for enemy in enemies:
+            record_id, _ = self.ids.pop(enemy)
+            self.live_enemies.discard(record_id)
+            self.remove_enemy(enemy)
+        for coin in coins:
+            del self.ids[coin]
+            self.remove_coin(coin)
+    
+    def update_window(self, scroll_x):
+        super().update_window(scroll_x)
+        first = max(0, int(scroll_x) // self.chunk_width - self.margin)
+        last = min(len(self.directory) - 1, int(scroll_x + WIDTH) // self.chunk_width + self.margin)
+        if (first, last) == self.window:
+            return
+        self.window = (first, last)
+        self.rehome_enemies()
+        for index in [i for i in self.loaded if i < first or i > last]:
+            self.evict(index)
+        for index in range(first, last + 1):
+            if index not in self.loaded:
+                self.materialize(index)
+    
+    def rehome_enemies(self):
+        """Move each enemy into the loaded chunk it now stands in."""
+        last = len(self.directory) - 1
+        for index, (_, enemies, _) in self.loaded.items():
+            for enemy in [e for e in enemies if min(last, max(0, int(e.x) // self.chunk_width)) != index]:
+                record_id, _ = self.ids[enemy]
+                current = min(last, max(0, int(enemy.x) // self.chunk_width))
+                target = self.loaded.get(current)
+                if target is None:
+                    continue  # Walked out of the loaded window; evicted with its last chunk
+                del enemies[enemy]
+                target[1][enemy] = None
+                self.ids[enemy] = (record_id, current)
+    
+    def kill_enemy(self, enemy):
+        # Forget the enemy before the pool can hand it out again
+        record_id, index = self.ids.pop(enemy)
+        del self.loaded[index][1][enemy]
+        self.live_enemies.discard(record_id)
+        self.consumed.add(("enemy", record_id))
+        super().kill_enemy(enemy)
+    
+    def collect_coin(self, coin):
+        record_id, index = self.ids.pop(coin)
+        del self.loaded[index][2][coin]
+        self.consumed.add(("coin", record_id))
+        super().collect_coin(coin)
+    
+    def vectorize(self):
+        raise RuntimeError("streamed levels cannot be vectorized")
+    
+    def set_entities(self, enemies, coins, enemy_ids=None, coin_ids=None):
+        raise RuntimeError("streamed levels cannot be restored from a snapshot")
+    
+    def restore_entities(self, enemies, coins):
+        raise RuntimeError("streamed levels cannot be restored from a snapshot")
+    
+    def close(self):
+        self.file.close()
+
+class SpriteAtlas:
+    """Every animation frame of the player, enemies and coins pre-rendered into one surface.
+    
+    Drawing an entity is then a single blit from the frame table instead of a
+    handful of draw primitives. Frames are painted with the entities' own
+    draw_frame methods, so the atlas always matches the primitive drawing.
+    """
+    MARGIN = 2  # Transparent border so antialiased edges never bleed between frames
+    
+    def __init__(self):
+        player, enemy, coin = Player(0, 0), Enemy(0, 0), Coin(0, 0)
+        
+        # (key, width, height, origin x, origin y, painter)
+        specs = []
+        for leg in range(-3, 4):
+            specs.append((("player", leg), player.width, player.height + 7, 0, 4,
+                          lambda surface, x, y, leg=leg: player.draw_frame(surface, x, y, leg)))
+        for direction in (-1, 1):
+            specs.append((("enemy", enemy.width, enemy.height, direction), enemy.width, enemy.height, 0, 0,
+                          lambda surface, x, y, d=direction: enemy.draw_frame(surface, x, y, d)))
+        for phase, bob in enumerate(COIN_BOB):
+            specs.append((("coin", phase), coin.width, coin.height + 6, 0, 3,
+                          lambda surface, x, y, bob=bob: coin.draw_frame(surface, x, y + bob)))
+        
+        margin = self.MARGIN
+        width = sum(spec[1] + 2 * margin for spec in specs)
+        height = max(spec[2] for spec in specs) + 2 * margin
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.frames = {}  # key -> (area in surface, origin x, origin y)
+        
+        x = 0
+        for key, frame_width, frame_height, origin_x, origin_y, paint in specs:
+            area = pygame.Rect(x, 0, frame_width + 2 * margin, frame_height + 2 * margin)
+            self.surface.set_clip(area)
+            paint(self.surface, x + margin + origin_x, margin + origin_y)
+            self.frames[key] = (area, margin + origin_x, margin + origin_y)
+            x += area.width
+        self.surface.set_clip(None)
+        
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+    
+    def blit(self, screen, key, x, y):
+        """Blit a frame with its origin at (x, y); returns False if there is no such frame."""
+        frame = self.frames.get(key)
+        if frame is None:
+            return False
+        area, origin_x, origin_y = frame
+        screen.blit(self.surface, (x - origin_x, y - origin_y), area)
+        return True
+
+class FontLoader:
+    """Fonts opened on first use, with system font lookups moved off the main thread.
+    
+    The default font (name None) opens straight from pygame's bundled file.
+    Named fonts have to be found first, and the first lookup scans every
+    installed font; that scan runs on a background thread started here. The
+    fonts themselves are always opened on the main thread in get(), since
+    FreeType is not safe to call from two threads at once, and get() only
+    blocks if a named font is wanted before the scan is done.
+    """
+    def __init__(self, specs):
+        self.specs = specs  # key -> (name, size)
+        self.fonts = {}
+        self.paths = {}  # key -> font file found for a named font, None for pygame's default
+        named = {key: spec for key, spec in specs.items() if spec[0] is not None}
+        self.thread = threading.Thread(target=self.find, args=(named,), daemon=True)
+        self.thread.start()
+    
+    def find(self, specs):
+        for key, (name, size) in specs.items():
+            self.paths[key] = pygame.font.match_font(name)
+    
+    def get(self, key):
+        font = self.fonts.get(key)
+        if font is None:
+            name, size = self.specs[key]
+            if name is not None:
+                self.thread.join()
+            font = self.fonts[key] = pygame.font.Font(self.paths.get(key), size)
+        return font
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed on font, text and color.
+    
+    HUD strings like "Coins: N" only hit font.render again when their value changes.
+    """
+    def __init__(self, max_entries=MAX_CACHED_TEXTS):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+
+class ParallaxLayer:
+    """One background layer pre-rendered into a strip that tiles horizontally.
+    
+    The strip is at least as wide as the screen, so any scroll position is
+    covered by at most two blits. speed is the fraction of the camera's
+    movement the layer follows: 0 stays put, 1 moves with the level.
+    Transparent areas are a run-length encoded colorkey rather than per-pixel
+    alpha, which keeps mostly empty layers cheap to blit.
+    """
+    KEY = (255, 0, 255)
+    
+    def __init__(self, surface, speed, y=0, transparent=False):
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        if transparent:
+            surface.set_colorkey(self.KEY, pygame.RLEACCEL)
+        self.surface = surface
+        self.width = surface.get_width()
+        self.speed = speed
+        self.y = y
+    
+    def draw(self, screen, scroll_x):
+        offset = int(scroll_x * self.speed) % self.width
+        screen.blit(self.surface, (-offset, self.y))
+        if self.width - offset < screen.get_width():
+            screen.blit(self.surface, (self.width - offset, self.y))
+
+class ParallaxBackground:
+    """Sky gradient, clouds and distant hills, drawn back to front as ParallaxLayers."""
+    SKY_TOP = (70, 100, 230)
+    HILL_GREEN = (120, 186, 140)
+    
+    def __init__(self):
+        self.layers = [
+            ParallaxLayer(self.render_sky(), 0),
+            ParallaxLayer(self.render_clouds(), 1 / 3, transparent=True),
+            ParallaxLayer(self.render_hills(), 1 / 2, HEIGHT - 130, transparent=True),
+        ]
+    
+    def render_sky(self):
+        # Vertical gradient reaching SKY_BLUE two thirds of the way down
+        sky = pygame.Surface((WIDTH, HEIGHT))
+        sky.fill(SKY_BLUE)
+        horizon = HEIGHT * 2 // 3
+        for y in range(horizon):
+            t = y / horizon
+            color = [round(top + (bottom - top) * t) for top, bottom in zip(self.SKY_TOP, SKY_BLUE)]
+            pygame.draw.line(sky, color, (0, y), (WIDTH - 1, y))
+        return sky
+    
+    def render_clouds(self):
+        # A cloud every 300 px, the spacing the per-frame clouds used
+        clouds = pygame.Surface((WIDTH + 300, 90))
+        clouds.fill(ParallaxLayer.KEY)
+        for x in range(0, clouds.get_width(), 300):
+            pygame.draw.ellipse(clouds, WHITE, (x, 50, 80, 40))
+            pygame.draw.ellipse(clouds, WHITE, (x + 20, 40, 70, 40))
+            pygame.draw.ellipse(clouds, WHITE, (x + 40, 50, 60, 40))
+        return clouds
+    
+    def render_hills(self):
+        hills = pygame.Surface((WIDTH * 2, 130))
+        hills.fill(ParallaxLayer.KEY)
+        for x, width, height in ((0, 360, 110), (280, 260, 70), (520, 420, 130),
+                                 (860, 300, 90), (1020, 180, 60)):
+            pygame.draw.ellipse(hills, self.HILL_GREEN, (x, 130 - height, width, height * 2))
+        return hills
+    
+    def draw(self, screen, scroll_x):
+        for layer in self.layers:
+            layer.draw(screen, scroll_x)
+
+class LevelRenderCache:
+    """Static level geometry (platforms and goal) pre-rendered into horizontal tiles.
+    
+    Tiles are rasterized the first time they scroll into view and reused after
+    that, so each frame costs one blit per visible tile whatever the level length.
+    The least recently used tiles are dropped past MAX_CACHED_CHUNKS to bound memory.
+    """
+    def __init__(self, level, chunk_width=CHUNK_WIDTH, max_chunks=MAX_CACHED_CHUNKS):
+        self.level = level
+        self.chunk_width = chunk_width
+        self.max_chunks = max_chunks
+        self.chunks = {}  # chunk index -> surface, oldest use first
+        self.builds = 0
+    
+    def build_chunk(self, index):
+        x0 = index * self.chunk_width
+        chunk = pygame.Surface((self.chunk_width, HEIGHT), pygame.SRCALPHA)
+        for platform in self.level.platforms_near(x0, 0, self.chunk_width, HEIGHT):
+            platform.draw(chunk, x0)
+        goal = self.level.goal
+        if goal and goal.x < x0 + self.chunk_width and goal.x + goal.width > x0:
+            goal.draw(chunk, x0)
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert_alpha()
+        self.builds += 1
+        return chunk
+    
+    def get_chunk(self, index):
+        chunk = self.chunks.pop(index, None)
+        if chunk is None:
+            chunk = self.build_chunk(index)
+            if len(self.chunks) >= self.max_chunks:
+                del self.chunks[next(iter(self.chunks))]
+        self.chunks[index] = chunk
+        return chunk
+    
+    def draw(self, screen, scroll_x):
+        scroll_x = int(scroll_x)
+        first = scroll_x // self.chunk_width
+        last = (scroll_x + screen.get_width() - 1) // self.chunk_width
+        for index in range(max(0, first), last + 1):
+            screen.blit(self.get_chunk(index), (index * self.chunk_width - scroll_x, 0))
+    
+    def invalidate(self):
+        self.chunks.clear()
+
+class DirtyRectTracker:
+    """Collects the screen regions that changed since the last frame.
+    
+    Sprites are marked every frame and always repainted at both their old and
+    new positions. Marks with a signature (HUD text, say) are only repainted
+    when the signature or rect changes. After invalidate() the next present()
+    falls back to a full flip.
+    """
     def __init__(self):
+        self.previous = {}  # key -> (rect, signature) presented last frame
+        self.current = {}
+        self.full = True
+    
+    def invalidate(self):
+        self.full = True
+    
+    def mark(self, key, rect, signature=None):
+        self.current[key] = (pygame.Rect(rect), signature)
+    
+    def present(self):
+        rects = None
+        if not self.full:
+            rects = []
+            previous = self.previous
+            for key, (rect, signature) in self.current.items():
+                old = previous.get(key)
+                if old is None:
+                    rects.append(rect)
+                elif signature is None or old != (rect, signature):
+                    rects.append(rect.union(old[0]))
+            for key in previous.keys() - self.current.keys():
+                rects.append(previous[key][0])
+            
+            screen_rect = pygame.display.get_surface().get_rect()
+            rects = [rect.clip(screen_rect) for rect in rects]
+            rects = [rect for rect in rects if rect.width and rect.height]
+            if len(rects) > MAX_DIRTY_RECTS:
+                rects = None
+        
+        if rects is None:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        
+        self.previous, self.current = self.current, {}
+        self.full = False
+        return rects
+
+class FrameProfiler:
+    """Per-phase frame timings in a fixed-size ring buffer.
+    
+    Callers lap() at the end of each phase; the time since the previous lap
+    is charged to that phase. Nothing is allocated per frame. When profiling
+    is off the game holds None instead, so the only cost left is a truth test
+    at each phase boundary.
+    """
+    PHASES = ("events", "player", "enemies", "scroll", "background",
+              "draw_game", "draw_ui", "present", "wait")
+    
+    def __init__(self, size=PROFILE_FRAMES):
+        self.size = size
+        self.index = {phase: i for i, phase in enumerate(self.PHASES)}
+        self.rings = [array("q", bytes(8 * size)) for _ in self.PHASES]
+        self.current = [0] * len(self.PHASES)
+        self.frames = 0
+        self.last = time.perf_counter_ns()
+    
+    def lap(self, phase):
+        now = time.perf_counter_ns()
+        self.current[self.index[phase]] += now - self.last
+        self.last = now
+    
+    def end_frame(self):
+        slot = self.frames % self.size
+        current = self.current
+        for i, ring in enumerate(self.rings):
+            ring[slot] = current[i]
+            current[i] = 0
+        self.frames += 1
+    
+    def stats(self):
+        """{phase: (average ms, p99 ms)} over the frames still in the buffer, plus "frame"."""
+        count = min(self.frames, self.size)
+        if not count:
+            return {}
+        p99 = min(count - 1, count * 99 // 100)
+        totals = [sum(ring[i] for ring in self.rings) for i in range(count)]
+        result = {}
+        for phase, ring in zip(self.PHASES + ("frame",), self.rings + [totals]):
+            window = sorted(ring[:count])
+            result[phase] = (sum(window) / count / 1e6, window[p99] / 1e6)
+        return result
+    
+    def export(self, path):
+        """Write the summary and the raw per-frame samples (in ns, oldest first) as JSON."""
+        count = min(self.frames, self.size)
+        start = self.frames % self.size if self.frames > self.size else 0
+        samples = {phase: ring[start:count].tolist() + ring[:start].tolist()
+                   for phase, ring in zip(self.PHASES, self.rings)}
+        summary = {phase: {"avg_ms": avg, "p99_ms": p99}
+                   for phase, (avg, p99) in self.stats().items()}
+        with open(path, "w") as f:
+            json.dump({"frames": self.frames, "summary": summary, "samples_ns": samples}, f)
+
+# Simulation snapshot: tick, status, scroll, player, then enemy and coin records.
+# Only what step() changes is kept; animation is derived from the tick, so it needs no state.
+SNAPSHOT_HEADER = struct.Struct("<IBdddd?biii?II")
+SNAPSHOT_ENEMY = struct.Struct("<IddHHbd")
+SNAPSHOT_COIN = struct.Struct("<Idd")
+# The same records as NumPy fields, so vectorized levels pack straight from their arrays
+SNAPSHOT_ENEMY_FIELDS = (("id", "<u4"), ("x", "<f8"), ("y", "<f8"), ("width", "<u2"),
+                         ("height", "<u2"), ("direction", "i1"), ("speed", "<f8"))
+SNAPSHOT_COIN_FIELDS = (("id", "<u4"), ("x", "<f8"), ("y", "<f8"))
+SIM_STATUSES = ("playing", "won", "dead")
+
+# Replay file: header, run-length encoded inputs, keyframe directory, snapshots
+REPLAY_MAGIC = b"SMLR"
+REPLAY_VERSION = 3
+REPLAY_HEADER = struct.Struct("<4sHHIIII")
+REPLAY_RUN = struct.Struct("<BH")
+REPLAY_KEYFRAME = struct.Struct("<III")
+
+class Simulation:
+    """Headless game state for one level, advanced by a fixed tick at a time.
+    
+    Each tick takes a bitmask of INPUT_* flags. Nothing here touches the display
+    or the clock, so it runs as fast as the physics allows.
+    """
+    def __init__(self, level_num, level=None):
+        self.level_num = level_num
+        self.level = level if level is not None else Level(level_num)
+        self.player = Player(*self.level.player_start)
+        self.scroll_x = 0
+        self.prev_scroll_x = 0  # Camera before the last tick, for interpolation
+        self.tick = 0
+        self.status = "playing"  # playing, won, dead
+        self.profiler = None  # FrameProfiler charged for the physics phases
+        self.level.update_window(self.scroll_x)
+    
+    def step(self, inputs):
+        if self.status != "playing":
+            return self.status
+        
+        player = self.player
+        profiler = self.profiler
+        self.prev_scroll_x = self.scroll_x
+        if inputs & INPUT_JUMP:
+            player.jump()
+        
+        dx = 0
+        if inputs & INPUT_LEFT:
+            dx = -PLAYER_SPEED
+        if inputs & INPUT_RIGHT:
+            dx = PLAYER_SPEED
+        
+        player.move(dx, self.level)
+        if profiler:
+            profiler.lap("player")
+        
+        # Move enemies
+        self.level.update_enemies()
+        if profiler:
+            profiler.lap("enemies")
+        
+        if player.invincible > 0:
+            player.invincible -= 1
+        
+        # Scroll screen
+        if player.x - self.scroll_x > WIDTH - SCROLL_THRESH:
+            self.scroll_x = player.x - (WIDTH - SCROLL_THRESH)
+        if player.x - self.scroll_x < SCROLL_THRESH:
+            self.scroll_x = player.x - SCROLL_THRESH
+        
+        # Keep scroll within level bounds
+        if self.scroll_x < 0:
+            self.scroll_x = 0
+        if self.scroll_x > self.level.level_width - WIDTH:
+            self.scroll_x = self.level.level_width - WIDTH
+        self.level.update_window(self.scroll_x)
+        
+        # Check if player reached goal
+        if player.collision(self.level.goal):
+            self.status = "won"
+        
+        # Check if player died
+        if not player.active or player.y > HEIGHT:
+            self.status = "dead"
+        
+        if profiler:
+            profiler.lap("scroll")
+        self.tick += 1
+        return self.status
+    
+    def run(self, inputs):
+        """Step through a sequence of input masks, stopping early when the level ends."""
+        for mask in inputs:
+            if self.step(mask) != "playing":
+                break
+        return self.status
+    
+    def snapshot(self):
+        """Pack the full simulation state into one flat buffer that restore() accepts.
+        
+        A fixed header holds the tick, camera and player, followed by one
+        fixed-size record per live enemy and coin. Built-in levels pack in a
+        few microseconds into a few hundred bytes; vectorized levels pack their
+        records straight from the store arrays.
+        """
+        player = self.player
+        enemy_count, enemy_data, coin_count, coin_data = self.level.pack_entities()
+        return b"".join([
+            SNAPSHOT_HEADER.pack(
+                self.tick, SIM_STATUSES.index(self.status), self.scroll_x,
+                player.x, player.y, player.vel_y, player.jumping, player.direction,
+                player.invincible, player.lives, player.coins, player.active,
+                enemy_count, coin_count),
+            enemy_data,
+            coin_data,
+        ])
+    
+    def restore(self, data):
+        """Return to the state captured by snapshot(); the level's platforms are kept.
+        
+        Restoring into the Simulation (or a fresh copy of the level) that took
+        the snapshot updates entities in place rather than rebuilding them.
+        """
+        player = self.player
+        (self.tick, status, self.scroll_x, player.x, player.y, player.vel_y, player.jumping,
+         player.direction, player.invincible, player.lives, player.coins, player.active,
+         enemy_count, coin_count) = SNAPSHOT_HEADER.unpack_from(data)
+        self.status = SIM_STATUSES[status]
+        player.prev_x, player.prev_y = player.x, player.y
+        self.prev_scroll_x = self.scroll_x
+        
+        start = SNAPSHOT_HEADER.size
+        middle = start + enemy_count * SNAPSHOT_ENEMY.size
+        end = middle + coin_count * SNAPSHOT_COIN.size
+        self.level.restore_entities(list(SNAPSHOT_ENEMY.iter_unpack(data[start:middle])),
+                                    list(SNAPSHOT_COIN.iter_unpack(data[middle:end])))
+        self.level.update_window(self.scroll_x)
+    
+    def observe(self):
+        """Compact observation for bots: player state, scroll position and tick."""
+        player = self.player
+        return (player.x, player.y, player.vel_y, player.jumping,
+                player.lives, player.coins, self.scroll_x, self.tick)
+
+class RollbackBuffer:
+    """Recent snapshots and inputs of a Simulation, for rewinding and re-simulating.
+    
+    record() is called with each tick's inputs just before the simulation
+    steps, or step() does both. Only the last capacity ticks are kept.
+    """
+    def __init__(self, sim, capacity=ROLLBACK_TICKS):
+        self.sim = sim
+        self.snapshots = deque(maxlen=capacity)
+        self.inputs = deque(maxlen=capacity)
+    
+    def __len__(self):
+        return len(self.snapshots)
+    
+    def record(self, inputs):
+        self.snapshots.append(self.sim.snapshot())
+        self.inputs.append(inputs)
+    
+    def step(self, inputs):
+        self.record(inputs)
+        return self.sim.step(inputs)
+    
+    def rewind(self, ticks):
+        """Restore the state from ticks ago (or the oldest kept) and return the inputs undone."""
+        ticks = min(ticks, len(self.snapshots))
+        if not ticks:
+            return []
+        undone = [self.inputs.pop() for _ in range(ticks)][::-1]
+        for _ in range(ticks - 1):
+            self.snapshots.pop()
+        self.sim.restore(self.snapshots.pop())
+        return undone
+    
+    def rollback(self, ticks, inputs=None):
+        """Rewind ticks and simulate forward again, with replacement inputs if given.
+        
+        This is how a late or corrected input is applied to past ticks.
+        Returns the simulation status afterwards.
+        """
+        undone = self.rewind(ticks)
+        for mask in undone if inputs is None else inputs:
+            self.step(mask)
+        return self.sim.status
+
+class ReplayRecorder:
+    """Steps a Simulation while logging its inputs and a keyframe every few ticks."""
+    def __init__(self, sim, keyframe_interval=KEYFRAME_INTERVAL):
+        self.sim = sim
+        self.keyframe_interval = keyframe_interval
+        self.start_tick = sim.tick
+        self.inputs = bytearray()
+        self.keyframes = [(sim.tick, sim.snapshot())]
+    
+    def step(self, inputs):
+        self.inputs.append(inputs)
+        status = self.sim.step(inputs)
+        if (self.sim.tick - self.start_tick) % self.keyframe_interval == 0:
+            self.keyframes.append((self.sim.tick, self.sim.snapshot()))
+        return status
+    
+    def replay(self):
+        return Replay(self.sim.level_num, bytes(self.inputs), self.keyframes,
+                      self.keyframe_interval, self.start_tick)
+    
+    def save(self, path):
+        self.replay().save(path)
+
+class Replay:
+    """A recorded session: the per-tick input masks plus periodic keyframe snapshots.
+    
+    Seeking restores the nearest keyframe at or before the target tick and
+    re-simulates at most keyframe_interval ticks from there. Replays only
+    cover the built-in and generated levels, not streamed level files.
+    """
+    def __init__(self, level_num, inputs, keyframes, keyframe_interval=KEYFRAME_INTERVAL,
+                 start_tick=0):
+        self.level_num = level_num
+        self.inputs = inputs
+        self.keyframes = keyframes  # [(tick, snapshot)], ascending
+        self.keyframe_interval = keyframe_interval
+        self.start_tick = start_tick
+    
+    @property
+    def end_tick(self):
+        return self.start_tick + len(self.inputs)
+    
+    def input_at(self, tick):
+        index = tick - self.start_tick
+        return self.inputs[index] if 0 <= index < len(self.inputs) else 0
+    
+    def save(self, path):
+        runs = []
+        for mask in self.inputs:
+            if runs and runs[-1][0] == mask and runs[-1][1] < 0xFFFF:
+                runs[-1][1] += 1
+            else:
+                runs.append([mask, 1])
+        with open(path, "wb") as f:
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.level_num,
+                                       self.keyframe_interval, self.start_tick,
+                                       len(runs), len(self.keyframes)))
+            f.write(b"".join(REPLAY_RUN.pack(mask, count) for mask, count in runs))
+            offset = 0
+            for tick, snapshot in self.keyframes:
+                f.write(REPLAY_KEYFRAME.pack(tick, offset, len(snapshot)))
+                offset += len(snapshot)
+            f.write(b"".join(snapshot for tick, snapshot in self.keyframes))
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        (magic, version, level_num, keyframe_interval, start_tick,
+         run_count, keyframe_count) = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a replay this game can read")
+        
+        offset = REPLAY_HEADER.size
+        inputs = bytearray()
+        for mask, count in REPLAY_RUN.iter_unpack(data[offset:offset + run_count * REPLAY_RUN.size]):
+            inputs.extend(bytes([mask]) * count)
+        offset += run_count * REPLAY_RUN.size
+        
+        directory = REPLAY_KEYFRAME.iter_unpack(
+            data[offset:offset + keyframe_count * REPLAY_KEYFRAME.size])
+        base = offset + keyframe_count * REPLAY_KEYFRAME.size
+        keyframes = [(tick, data[base + start:base + start + length])
+                     for tick, start, length in directory]
+        return cls(level_num, bytes(inputs), keyframes, keyframe_interval, start_tick)
+    
+    def new_simulation(self, vectorized=False):
+        level = Level(self.level_num)
+        if vectorized:
+            level.vectorize()
+        return Simulation(self.level_num, level)
+    
+    def seek(self, sim, tick):
+        """Move sim to the given tick via the nearest earlier keyframe."""
+        i = bisect.bisect_right([kf_tick for kf_tick, snapshot in self.keyframes], tick) - 1
+        sim.restore(self.keyframes[max(i, 0)][1])
+        while sim.tick < tick and sim.status == "playing":
+            sim.step(self.input_at(sim.tick))
+        return sim
+    
+    def simulation_at(self, tick, vectorized=False):
+        return self.seek(self.new_simulation(vectorized), tick)
+    
+    def verify(self, vectorized=False):
+        """Re-simulate the whole replay headless and compare it with every keyframe.
+        
+        Returns the first tick whose state differs, or None when it all matches.
+        """
+        sim = self.simulation_at(self.start_tick, vectorized)
+        for tick, snapshot in self.keyframes:
+            while sim.tick < tick and sim.status == "playing":
+                sim.step(self.input_at(sim.tick))
+            if sim.snapshot() != snapshot:
+                return tick
+        return None
+
+class SimBatch:
+    """A batch of independent Simulations stepped together in one call."""
+    def __init__(self, level_nums, vectorized=False):
+        self.level_nums = list(level_nums)
+        self.vectorized = vectorized
+        self.sims = [None] * len(self.level_nums)
+        self.reset()
+    
+    def new_sim(self, level_num):
+        level = Level(level_num)
+        if self.vectorized:
+            level.vectorize()
+        return Simulation(level_num, level)
+    
+    def reset(self, indices=None):
+        """Restart the given instances (all by default) and return every observation."""
+        for i in range(len(self.sims)) if indices is None else indices:
+            self.sims[i] = self.new_sim(self.level_nums[i])
+        return [sim.observe() for sim in self.sims]
+    
+    def step(self, actions):
+        """Advance every instance one tick; finished instances ignore their action.
+        
+        Returns (observations, rewards, dones) lists in instance order.
+        """
+        observations, rewards, dones = [], [], []
+        for sim, action in zip(self.sims, actions):
+            reward = 0
+            if sim.status == "playing":
+                player = sim.player
+                coins, lives = player.coins, player.lives
+                status = sim.step(action)
+                reward += (player.coins - coins) * REWARD_COIN
+                reward += (lives - player.lives) * REWARD_HIT
+                if status == "dead":
+                    reward += REWARD_DEATH
+                elif status == "won":
+                    reward += REWARD_GOAL
+            observations.append(sim.observe())
+            rewards.append(reward)
+            dones.append(sim.status != "playing")
+        return observations, rewards, dones
+
+def batch_worker(conn, level_nums, vectorized):
+    """Process-pool worker owning one shard of a BatchEnv."""
+    batch = SimBatch(level_nums, vectorized)
+    while True:
+        command, arg = conn.recv()
+        if command == "step":
+            conn.send(batch.step(arg))
+        elif command == "reset":
+            conn.send(batch.reset(arg))
+        else:
+            break
+    conn.close()
+
+class BatchEnv:
+    """Steps N independent games per call, optionally sharded across worker processes.
+    
+    Every instance runs the same Simulation.step as the game, so rules match
+    Player.move and Enemy.move exactly. With processes > 0 the instances are
+    split into contiguous shards, one per worker, and each step is a single
+    round trip per worker.
+    """
+    def __init__(self, level_nums, processes=0, vectorized=False):
+        self.size = len(level_nums)
+        self.batch = None
+        self.workers = []  # (process, connection, first index, end index)
+        if not processes:
+            self.batch = SimBatch(level_nums, vectorized)
+            return
+        
+        processes = min(processes, self.size)
+        bounds = [self.size * i // processes for i in range(processes + 1)]
+        for start, stop in zip(bounds, bounds[1:]):
+            conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=batch_worker, args=(child_conn, level_nums[start:stop], vectorized), daemon=True)
+            process.start()
+            child_conn.close()
+            self.workers.append((process, conn, start, stop))
+    
+    def reset(self, indices=None):
+        if self.batch is not None:
+            return self.batch.reset(indices)
+        for process, conn, start, stop in self.workers:
+            local = None if indices is None else [i - start for i in indices if start <= i < stop]
+            conn.send(("reset", local))
+        observations = []
+        for process, conn, start, stop in self.workers:
+            observations.extend(conn.recv())
+        return observations
+    
+    def step(self, actions):
+        if self.batch is not None:
+            return self.batch.step(actions)
+        for process, conn, start, stop in self.workers:
+            conn.send(("step", actions[start:stop]))
+        observations, rewards, dones = [], [], []
+        for process, conn, start, stop in self.workers:
+            shard_observations, shard_rewards, shard_dones = conn.recv()
+            observations.extend(shard_observations)
+            rewards.extend(shard_rewards)
+            dones.extend(shard_dones)
+        return observations, rewards, dones
+    
+    def close(self):
+        for process, conn, start, stop in self.workers:
+            conn.send(("close", None))
+            conn.close()
+            process.join()
+        self.workers = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+# Solver moves, tried in this order from every state
+SOLVER_ACTIONS = (INPUT_RIGHT, INPUT_RIGHT | INPUT_JUMP, 0, INPUT_JUMP,
+                  INPUT_LEFT, INPUT_LEFT | INPUT_JUMP)
+
+def solver_key(sim):
+    """Discretized search state: where the player is, how it is moving and what it has left."""
+    player = sim.player
+    return (int(player.x) // SOLVER_CELL, int(player.y) // SOLVER_CELL, round(player.vel_y),
+            player.jumping, player.lives, player.invincible > 0, len(sim.level.enemies))
+
+def solve_level(level, level_num=0, max_nodes=SOLVER_MAX_NODES):
+    """Search for an input sequence that takes the player from the start to the goal.
+    
+    Every state is produced by the real Simulation.step, so the physics, enemy
+    patrols and damage rules are exactly the game's. States are expanded
+    closest-to-goal first, each action held for SOLVER_HOLD ticks, and a state
+    whose solver_key() was already seen is pruned. The witness is re-run from
+    the start before it is returned.
+    
+    Returns {"solved", "witness" (per-tick input masks or None), "nodes",
+    "exhausted"}. An unsolved level is only shown impossible (at this
+    resolution) when the search ran out of states rather than out of nodes.
+    """
+    sim = Simulation(level_num, level)
+    start = sim.snapshot()
+    goal_x = level.goal.x
+    parents = [(None, None)]  # node id -> (parent id, action)
+    frontier = [(goal_x - sim.player.x, 0, 0, start)]
+    visited = {solver_key(sim)}
+    
+    while frontier and len(parents) < max_nodes:
+        distance, tick, node, snapshot = heapq.heappop(frontier)
+        for action in SOLVER_ACTIONS:
+            sim.restore(snapshot)
+            for _ in range(SOLVER_HOLD):
+                if sim.step(action) != "playing":
+                    break
+            if sim.status == "dead":
+                continue
+            
+            parents.append((node, action))
+            if sim.status == "won":
+                return {"solved": True, "nodes": len(parents), "exhausted": False,
+                        "witness": solver_witness(level, level_num, start, parents)}
+            key = solver_key(sim)
+            if key not in visited:
+                visited.add(key)
+                heapq.heappush(frontier, (goal_x - sim.player.x, sim.tick,
+                                          len(parents) - 1, sim.snapshot()))
+    
+    sim.restore(start)
+    return {"solved": False, "witness": None, "nodes": len(parents), "exhausted": not frontier}
+
+def solver_witness(level, level_num, start, parents):
+    """Expand the winning node's action chain into per-tick inputs, trimmed at the win."""
+    actions = []
+    node = len(parents) - 1
+    while parents[node][0] is not None:
+        node, action = parents[node]
+        actions.append(action)
+    inputs = [action for action in reversed(actions) for _ in range(SOLVER_HOLD)]
+    
+    sim = Simulation(level_num, level)
+    sim.restore(start)
+    for i, mask in enumerate(inputs):
+        if sim.step(mask) != "playing":
+            break
+    if sim.status != "won":
+        raise RuntimeError("solver witness does not reach the goal")
+    return inputs[:i + 1]
+
+def solve_worker(spec):
+    """Solve one level spec: a built-in level number or a (width, seed) pair for Level.generate."""
+    if isinstance(spec, int):
+        result = solve_level(Level(spec), spec)
+    else:
+        result = solve_level(Level.generate(*spec))
+    result["level"] = spec
+    return result
+
+def solve_levels(specs, processes=0):
+    """Solve many levels, fanned out over a process pool unless processes is 0.
+    
+    Yields results as they finish, so the order can differ from specs.
+    """
+    if processes == 0:
+        yield from map(solve_worker, specs)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(solve_worker, specs)
+
+def format_inputs(inputs):
+    """Run-length text for an input sequence, e.g. "R12 RJ6 -3"."""
+    names = ((INPUT_LEFT, "L"), (INPUT_RIGHT, "R"), (INPUT_JUMP, "J"))
+    runs = []
+    for mask in inputs:
+        name = "".join(letter for bit, letter in names if mask & bit) or "-"
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return " ".join(f"{name}{count}" for name, count in runs)
+
+# Game snapshot: screen, current level and unlocked levels, then the Simulation snapshot
+GAME_HEADER = struct.Struct("<BB3?")
+GAME_STATES = ("menu", "level_select", "playing", "game_over", "victory")
+
+class Game:
+    def __init__(self, dirty_rects=False, vectorized=False, level_file=None, sleep_offscreen=False,
+                 record=None, replay=None, profile=False, profile_out=None, report_startup=False,
+                 max_fps=FPS, scale=1, fullscreen=False, smooth=False):
+        # Only the subsystems the game uses; pygame.init() would also start audio and joysticks
+        pygame.display.init()
+        pygame.font.init()
+        self.open_window(scale, fullscreen, smooth)
+        if self.scaled and dirty_rects:
+            raise ValueError("dirty rects cannot be combined with a scaled window")
+        pygame.display.set_caption("Super Mario Land")
+        self.fonts = FontLoader({"font": (None, 32), "small_font": (None, 24),
+                                 "profile_font": ("monospace", 14)})
+        self.report_startup = report_startup
+        self.max_fps = max_fps  # Render cap, 0 for none; the simulation always runs at TICK_RATE
+        self.alpha = 1.0  # How far rendering is between the previous and the latest tick
+        self.pending_inputs = 0  # Presses seen since the last tick
+        self.startup_time = None  # Seconds from import to the first presented frame
+        self.text = TextCache()
+        self.atlas = SpriteAtlas()
+        self.background = ParallaxBackground()
+        
         self.state = "menu"  # menu, level_select, playing, game_over, victory
         self.current_level = 1
-        self.player = None
-        self.level = None
-        self.scroll_x = 0
+        self.sim = None
+        self.render_cache = None
         self.level_complete = [False] * 3
         self.level_complete[0] = True  # First level always available
+        self.vectorized = vectorized
+        self.level_file = level_file  # Streamed level played in place of every level slot
+        self.sleep_offscreen = sleep_offscreen
+        self.record = record  # Path the latest level session is saved to
+        self.recorder = None
+        self.replay = replay  # Replay fed in place of the keyboard
+        self.history = None  # RollbackBuffer for BACKSPACE rewinds
+        self.quicksave = None  # snapshot() taken with F5, restored with F9
+        
+        # Optional dirty-rect presentation, see render()
+        self.dirty = DirtyRectTracker() if dirty_rects else None
+        self.last_view = None
+        
+        # Frame profiler, toggled with F3; None while off
+        self.profile_out = profile_out
+        self.profiler = None
+        self.profile_data = None  # Most recent profiler, kept for export
+        self.profile_lines = []
+        if profile or profile_out:
+            self.toggle_profiler()
+    
+    def open_window(self, scale, fullscreen, smooth):
+        """Open the display; scaled modes draw into an offscreen WIDTH x HEIGHT target.
+        
+        The target is scaled into the window once per frame by present(), by
+        the largest whole factor that fits (nearest neighbour, so pixels stay
+        square and sharp) or, with smooth, by the largest factor of any size
+        with smoothscale. Leftover window area is a black border.
+        """
+        if fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode((WIDTH * scale, HEIGHT * scale))
+        self.scaled = self.window.get_size() != (WIDTH, HEIGHT)
+        self.smooth = smooth
+        if not self.scaled:
+            self.screen = self.window
+            return
+        
+        self.screen = pygame.Surface((WIDTH, HEIGHT)).convert()
+        window_width, window_height = self.window.get_size()
+        if smooth:
+            factor = min(window_width / WIDTH, window_height / HEIGHT)
+        else:
+            factor = max(1, min(window_width // WIDTH, window_height // HEIGHT))
+        output = pygame.Rect(0, 0, int(WIDTH * factor), int(HEIGHT * factor))
+        output.center = self.window.get_rect().center
+        self.window.fill(BLACK)
+        self.output = self.window.subsurface(output.clip(self.window.get_rect()))
+    
+    def present(self):
+        if self.scaled:
+            if self.smooth:
+                pygame.transform.smoothscale(self.screen, self.output.get_size(), self.output)
+            else:
+                pygame.transform.scale(self.screen, self.output.get_size(), self.output)
+        pygame.display.flip()
+    
+    @property
+    def font(self):
+        return self.fonts.get("font")
+    
+    @property
+    def small_font(self):
+        return self.fonts.get("small_font")
+    
+    @property
+    def profile_font(self):
+        return self.fonts.get("profile_font")
+    
+    @property
+    def player(self):
+        return self.sim.player if self.sim else None
+    
+    @property
+    def level(self):
+        return self.sim.level if self.sim else None
+    
+    @property
+    def scroll_x(self):
+        """Camera position for drawing, interpolated between the last two ticks."""
+        if not self.sim:
+            return 0
+        sim = self.sim
+        return round(sim.prev_scroll_x + (sim.scroll_x - sim.prev_scroll_x) * self.alpha)
         
     def start_level(self, level_num):
         self.current_level = level_num
-        self.level = Level(level_num)
-        self.player = Player(*self.level.player_start)
-        self.scroll_x = 0
+        if self.sim is not None:
+            self.sim.level.close()
+        if self.level_file:
+            level = StreamedLevel(self.level_file)
+        else:
+            level = Level(level_num)
+            if self.vectorized:
+                level.vectorize()
+        if self.sleep_offscreen:
+            level.sleep_margin = ENEMY_WAKE_MARGIN
+        self.sim = Simulation(level_num, level)
+        self.sim.profiler = self.profiler
+        self.render_cache = LevelRenderCache(self.sim.level)
         self.state = "playing"
+        self.pending_inputs = 0
+        if self.record:
+            self.recorder = ReplayRecorder(self.sim)
+        # Rewinding would desync a recording or replay, and streamed levels cannot be restored
+        rewindable = not (self.level_file or self.record or self.replay)
+        self.history = RollbackBuffer(self.sim) if rewindable else None
     
     def run(self):
+        """Main loop with a fixed-timestep simulation.
+        
+        Real time accumulates and is spent in whole ticks of 1/TICK_RATE s, so
+        gameplay speed does not depend on the frame rate. When rendering falls
+        behind, up to MAX_TICKS_PER_FRAME ticks run before the next frame is
+        drawn; any backlog past that is dropped. Frames are drawn alpha of the
+        way between the last two ticks.
+        """
         clock = pygame.time.Clock()
+        tick_seconds = 1 / TICK_RATE
+        accumulator = 0
+        previous = time.perf_counter()
         
         while True:
-            # Event handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        if self.state == "playing":
-                            self.state = "level_select"
-                    
-                    if self.state == "playing":
-                        if event.key == pygame.K_SPACE:
-                            self.player.jump()
-                    
-                    if self.state == "menu":
-                        if event.key == pygame.K_RETURN:
-                            self.state = "level_select"
-                    
-                    if self.state == "level_select":
-                        if event.key == pygame.K_1 and self.level_complete[0]:
-                            self.start_level(1)
-                        if event.key == pygame.K_2 and self.level_complete[1]:
-                            self.start_level(2)
-                        if event.key == pygame.K_3 and self.level_complete[2]:
-                            self.start_level(3)
-                    
-                    if self.state in ["game_over", "victory"]:
-                        if event.key == pygame.K_RETURN:
-                            self.state = "level_select"
+            self.pending_inputs |= self.handle_events()
+            if self.profiler:
+                self.profiler.lap("events")
+            
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+            ticks = 0
+            while accumulator >= tick_seconds and ticks < MAX_TICKS_PER_FRAME:
+                accumulator -= tick_seconds
+                ticks += 1
+                if self.state == "playing":
+                    inputs = self.pending_inputs
+                    self.pending_inputs = 0
+                    keys = pygame.key.get_pressed()
+                    if keys[pygame.K_LEFT]:
+                        inputs |= INPUT_LEFT
+                    if keys[pygame.K_RIGHT]:
+                        inputs |= INPUT_RIGHT
+                    self.update(inputs)
+            if accumulator >= tick_seconds:
+                accumulator = 0
+            self.alpha = accumulator / tick_seconds if self.state == "playing" else 1.0
             
-            # Game logic
-            if self.state == "playing":
-                keys = pygame.key.get_pressed()
-                dx = 0
-                if keys[pygame.K_LEFT]:
-                    dx = -PLAYER_SPEED
-                if keys[pygame.K_RIGHT]:
-                    dx = PLAYER_SPEED
+            self.render()
+            if self.startup_time is None:
+                self.startup_time = time.perf_counter() - STARTED
+                if self.report_startup:
+                    print(f"First frame after {self.startup_time * 1000:.0f} ms")
+            clock.tick(self.max_fps)
+            if self.profiler:
+                self.profiler.lap("wait")
+                self.profiler.end_frame()
+    
+    def handle_events(self):
+        """Process queued events and return the INPUT_JUMP bit if a jump was pressed."""
+        inputs = 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.save_recording()
+                if self.profile_out and self.profile_data:
+                    self.profile_data.export(self.profile_out)
+                pygame.quit()
+                sys.exit()
+            
+            if event.type == pygame.WINDOWEXPOSED and self.dirty:
+                self.dirty.invalidate()
+            if event.type == pygame.WINDOWEXPOSED and self.scaled:
+                self.window.fill(BLACK)
+            
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F3:
+                    self.toggle_profiler()
                 
-                self.player.move(dx, self.level.platforms, self.level.enemies, self.level.coins)
+                if self.history is not None:
+                    if event.key == pygame.K_F5 and self.state == "playing":
+                        self.quicksave = self.snapshot()
+                    if event.key == pygame.K_F9 and self.quicksave:
+                        self.restore(self.quicksave)
+                    if event.key == pygame.K_BACKSPACE and self.state in ("playing", "game_over"):
+                        self.history.rewind(REWIND_TICKS)
+                        self.state = "playing"
                 
-                # Move enemies
-                for enemy in self.level.enemies:
-                    if enemy.active:
-                        enemy.move(self.level.platforms)
+                if event.key == pygame.K_ESCAPE:
+                    if self.state == "playing":
+                        self.save_recording()
+                        self.state = "level_select"
                 
-                # Scroll screen
-                if self.player.x - self.scroll_x > WIDTH - SCROLL_THRESH:
-                    self.scroll_x = self.player.x - (WIDTH - SCROLL_THRESH)
-                if self.player.x - self.scroll_x < SCROLL_THRESH:
-                    self.scroll_x = self.player.x - SCROLL_THRESH
+                if self.state == "playing":
+                    if event.key == pygame.K_SPACE:
+                        inputs |= INPUT_JUMP
                 
-                # Keep scroll within level bounds
-                if self.scroll_x < 0:
-                    self.scroll_x = 0
-                if self.scroll_x > self.level.level_width - WIDTH:
-                    self.scroll_x = self.level.level_width - WIDTH
+                if self.state == "menu":
+                    if event.key == pygame.K_RETURN:
+                        self.state = "level_select"
                 
-                # Check if player reached goal
-                if self.player.collision(self.level.goal):
-                    self.level_complete[self.current_level - 1] = True
-                    if self.current_level < 3:
-                        self.level_complete[self.current_level] = True
-                    self.state = "victory"
+                if self.state == "level_select":
+                    if event.key == pygame.K_1 and self.level_complete[0]:
+                        self.start_level(1)
+                    if event.key == pygame.K_2 and self.level_complete[1]:
+                        self.start_level(2)
+                    if event.key == pygame.K_3 and self.level_complete[2]:
+                        self.start_level(3)
                 
-                # Check if player died
-                if not self.player.active or self.player.y > HEIGHT:
-                    self.state = "game_over"
-            
-            # Drawing
-            screen.fill(SKY_BLUE)
-            
-            # Draw clouds
-            for i in range(5):
-                x = (i * 300 + self.scroll_x // 3) % (WIDTH + 300) - 100
-                pygame.draw.ellipse(screen, WHITE, (x, 50, 80, 40))
-                pygame.draw.ellipse(screen, WHITE, (x + 20, 40, 70, 40))
-                pygame.draw.ellipse(screen, WHITE, (x + 40, 50, 60, 40))
-            
-            if self.state == "menu":
-                self.draw_menu()
-            elif self.state == "level_select":
-                self.draw_level_select()
-            elif self.state == "playing":
-                self.draw_game()
-            elif self.state == "game_over":
-                self.draw_game()
-                self.draw_game_over()
-            elif self.state == "victory":
-                self.draw_game()
-                self.draw_victory()
-            
-            # Draw UI
-            if self.state == "playing":
-                self.draw_ui()
-            
-            pygame.display.flip()
-            clock.tick(FPS)
+                if self.state in ["game_over", "victory"]:
+                    if event.key == pygame.K_RETURN:
+                        self.state = "level_select"
+        return inputs
+    
+    def update(self, inputs):
+        if self.replay is not None:
+            inputs = self.replay.input_at(self.sim.tick)
+        if self.history is not None:
+            self.history.record(inputs)
+        if self.recorder is not None:
+            status = self.recorder.step(inputs)
+            if status != "playing":
+                self.save_recording()
+        else:
+            status = self.sim.step(inputs)
+        if status == "won":
+            self.level_complete[self.current_level - 1] = True
+            if self.current_level < 3:
+                self.level_complete[self.current_level] = True
+            self.state = "victory"
+        elif status == "dead":
+            self.state = "game_over"
+    
+    def toggle_profiler(self):
+        if self.profiler:
+            self.profiler = None
+        else:
+            self.profiler = self.profile_data = FrameProfiler()
+            self.profile_lines = []
+        if self.sim:
+            self.sim.profiler = self.profiler
+        if self.dirty:
+            self.dirty.invalidate()
+    
+    def snapshot(self):
+        """Pack the screen, the unlocked levels and the running level's simulation."""
+        header = GAME_HEADER.pack(GAME_STATES.index(self.state), self.current_level,
+                                  *self.level_complete)
+        return header + (self.sim.snapshot() if self.sim else b"")
+    
+    def restore(self, data):
+        state, level_num, *level_complete = GAME_HEADER.unpack_from(data)
+        self.level_complete = level_complete
+        if len(data) > GAME_HEADER.size:
+            if self.sim is None or self.current_level != level_num:
+                self.start_level(level_num)
+            self.sim.restore(data[GAME_HEADER.size:])
+            self.history = RollbackBuffer(self.sim)
+        self.state = GAME_STATES[state]
+        if self.dirty:
+            self.dirty.invalidate()
+    
+    def save_recording(self):
+        if self.recorder is not None:
+            self.recorder.save(self.record)
+            self.recorder = None
+    
+    def render(self):
+        """Draw the frame and push it to the display.
+        
+        In dirty-rect mode only the changed regions are pushed. Scrolling or
+        switching screens forces a full flip, and screens other than gameplay
+        are not redrawn at all until something invalidates them.
+        """
+        profiler = self.profiler
+        if self.dirty is None:
+            self.draw()
+            self.present()
+            if profiler:
+                profiler.lap("present")
+            return
+        
+        view = (self.state, self.scroll_x)
+        if view != self.last_view:
+            self.last_view = view
+            self.dirty.invalidate()
+        elif self.state != "playing" and not self.dirty.full:
+            return
+        
+        self.draw()
+        if self.state == "playing":
+            self.mark_dirty()
+        if profiler:
+            self.dirty.mark("profile", self.profile_rect())
+        self.dirty.present()
+        if profiler:
+            profiler.lap("present")
+    
+    def mark_dirty(self):
+        dirty = self.dirty
+        scroll_x = self.scroll_x
+        player = self.player
+        # Hat pokes 4 px above the player and the leg swings 3 px below
+        x, y = player.position(self.alpha)
+        dirty.mark(player, (x - scroll_x, y - 4, player.width, player.height + 7))
+        left, right = scroll_x, scroll_x + WIDTH
+        for enemy in self.level.visible_enemies(left - 4, right + 4):
+            dirty.mark(enemy, (enemy.position(self.alpha) - scroll_x - 4, enemy.y,
+                               enemy.width + 8, enemy.height))
+        for coin in self.level.visible_coins(left, right):
+            dirty.mark(coin, (coin.x - scroll_x, coin.y - 3, coin.width, coin.height + 6))
+        dirty.mark("hud", (0, 0, WIDTH, 36), (player.lives, player.coins))
+    
+    def draw(self):
+        screen = self.screen
+        self.background.draw(screen, self.scroll_x)
+        
+        profiler = self.profiler
+        if profiler:
+            profiler.lap("background")
+        
+        if self.state == "menu":
+            self.draw_menu()
+        elif self.state == "level_select":
+            self.draw_level_select()
+        elif self.state == "playing":
+            self.draw_game()
+        elif self.state == "game_over":
+            self.draw_game()
+            self.draw_game_over()
+        elif self.state == "victory":
+            self.draw_game()
+            self.draw_victory()
+        if profiler:
+            profiler.lap("draw_game")
+        
+        # Draw UI
+        if self.state == "playing":
+            self.draw_ui()
+        if profiler:
+            self.draw_profile()
+            profiler.lap("draw_ui")
+    
+    def profile_rect(self):
+        return (6, 40, 230, 6 + 16 * (len(FrameProfiler.PHASES) + 2))
+    
+    def draw_profile(self):
+        """Overlay the profiler's rolling averages and p99s, refreshed every PROFILE_REFRESH frames."""
+        profiler = self.profiler
+        if profiler.frames % PROFILE_REFRESH == 0 or not self.profile_lines:
+            stats = profiler.stats()
+            lines = [f"{'phase':<10}{'avg ms':>8}{'p99 ms':>8}"]
+            lines += [f"{phase:<10}{avg:>8.2f}{p99:>8.2f}" for phase, (avg, p99) in stats.items()]
+            # Rendered directly: these change too often to be worth a TextCache slot
+            self.profile_lines = [self.profile_font.render(line, True, WHITE) for line in lines]
+        
+        rect = pygame.Rect(self.profile_rect())
+        backdrop = pygame.Surface(rect.size, pygame.SRCALPHA)
+        backdrop.fill((0, 0, 0, 160))
+        self.screen.blit(backdrop, rect)
+        for i, line in enumerate(self.profile_lines):
+            self.screen.blit(line, (rect.x + 4, rect.y + 4 + 16 * i))
     
     def draw_menu(self):
         # Draw title
-        title = font.render("SUPER MARIO LAND", True, RED)
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//4))
+        title = self.text.render(self.font, "SUPER MARIO LAND", RED)
+        self.screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//4))
         
         # Draw instructions
-        instructions = small_font.render("Press ENTER to start", True, WHITE)
-        screen.blit(instructions, (WIDTH//2 - instructions.get_width()//2, HEIGHT//2))
+        instructions = self.text.render(self.small_font, "Press ENTER to start", WHITE)
+        self.screen.blit(instructions, (WIDTH//2 - instructions.get_width()//2, HEIGHT//2))
         
         # Draw character
-        pygame.draw.rect(screen, RED, (WIDTH//2 - 10, HEIGHT*3//4 - 20, 20, 30))
-        pygame.draw.rect(screen, (255, 200, 150), (WIDTH//2 - 10, HEIGHT*3//4 - 30, 20, 15))
-        pygame.draw.rect(screen, RED, (WIDTH//2 - 15, HEIGHT*3//4 - 35, 30, 10))
+        pygame.draw.rect(self.screen, RED, (WIDTH//2 - 10, HEIGHT*3//4 - 20, 20, 30))
+        pygame.draw.rect(self.screen, (255, 200, 150), (WIDTH//2 - 10, HEIGHT*3//4 - 30, 20, 15))
+        pygame.draw.rect(self.screen, RED, (WIDTH//2 - 15, HEIGHT*3//4 - 35, 30, 10))
         
         # Draw ground
-        pygame.draw.rect(screen, GROUND_GREEN, (0, HEIGHT - 40, WIDTH, 40))
+        pygame.draw.rect(self.screen, GROUND_GREEN, (0, HEIGHT - 40, WIDTH, 40))
     
     def draw_level_select(self):
         # Draw title
-        title = font.render("SELECT A LEVEL", True, YELLOW)
-        screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
+        title = self.text.render(self.font, "SELECT A LEVEL", YELLOW)
+        self.screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
         
         # Draw level options
         for i in range(3):
             color = GREEN if self.level_complete[i] else GRAY
-            level_text = font.render(f"LEVEL {i+1}", True, color)
-            screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 150 + i*80))
+            level_text = self.text.render(self.font, f"LEVEL {i+1}", color)
+            self.screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 150 + i*80))
             
             if self.level_complete[i]:
-                key_text = small_font.render(f"Press {i+1} to play", True, WHITE)
-                screen.blit(key_text, (WIDTH//2 - key_text.get_width()//2, 190 + i*80))
+                key_text = self.text.render(self.small_font, f"Press {i+1} to play", WHITE)
+                self.screen.blit(key_text, (WIDTH//2 - key_text.get_width()//2, 190 + i*80))
             
             # Draw level preview
             preview_y = 150 + i*80
-            pygame.draw.rect(screen, GROUND_GREEN, (WIDTH//2 - 70, preview_y - 10, 140, 60))
+            pygame.draw.rect(self.screen, GROUND_GREEN, (WIDTH//2 - 70, preview_y - 10, 140, 60))
             
             # Draw platforms
-            pygame.draw.rect(screen, BROWN, (WIDTH//2 - 60, preview_y + 10, 40, 10))
-            pygame.draw.rect(screen, BROWN, (WIDTH//2, preview_y, 30, 10))
+            pygame.draw.rect(self.screen, BROWN, (WIDTH//2 - 60, preview_y + 10, 40, 10))
+            pygame.draw.rect(self.screen, BROWN, (WIDTH//2, preview_y, 30, 10))
             
             # Draw player
-            pygame.draw.rect(screen, RED, (WIDTH//2 - 50, preview_y, 8, 12))
+            pygame.draw.rect(self.screen, RED, (WIDTH//2 - 50, preview_y, 8, 12))
             
             # Draw goal
-            pygame.draw.rect(screen, GRAY, (WIDTH//2 + 50, preview_y - 20, 3, 30))
-            pygame.draw.polygon(screen, RED, [
+            pygame.draw.rect(self.screen, GRAY, (WIDTH//2 + 50, preview_y - 20, 3, 30))
+            pygame.draw.polygon(self.screen, RED, [
                 (WIDTH//2 + 53, preview_y - 15),
                 (WIDTH//2 + 53, preview_y),
                 (WIDTH//2 + 65, preview_y - 7)
             ])
     
     def draw_game(self):
-        # Draw platforms
-        for platform in self.level.platforms:
-            platform.draw(screen, self.scroll_x)
-        
-        # Draw coins
-        for coin in self.level.coins:
-            coin.draw(screen, self.scroll_x)
+        # Draw platforms and goal from the pre-rendered tiles
+        self.render_cache.draw(self.screen, self.scroll_x)
         
-        # Draw enemies
-        for enemy in self.level.enemies:
-            if enemy.active:
-                enemy.draw(screen, self.scroll_x)
+        # Draw coins and enemies overlapping the screen (eyes reach 4 px past an enemy)
+        left, right = self.scroll_x, self.scroll_x + WIDTH
+        tick = self.sim.tick
+        for coin in self.level.visible_coins(left, right):
+            coin.draw(self.screen, self.scroll_x, self.atlas, tick)
         
-        # Draw goal
-        if self.level.goal:
-            self.level.goal.draw(screen, self.scroll_x)
+        for enemy in self.level.visible_enemies(left - 4, right + 4):
+            enemy.draw(self.screen, self.scroll_x, self.atlas, self.alpha)
         
         # Draw player
-        self.player.draw(screen, self.scroll_x)
+        self.player.draw(self.screen, self.scroll_x, self.atlas, self.alpha, tick)
     
     def draw_ui(self):
         # Draw lives
         for i in range(self.player.lives):
-            pygame.draw.rect(screen, RED, (10 + i*25, 10, 15, 20))
+            pygame.draw.rect(self.screen, RED, (10 + i*25, 10, 15, 20))
         
         # Draw coins
-        coin_text = small_font.render(f"Coins: {self.player.coins}", True, YELLOW)
-        screen.blit(coin_text, (WIDTH - coin_text.get_width() - 10, 10))
+        coin_text = self.text.render(self.small_font, f"Coins: {self.player.coins}", YELLOW)
+        self.screen.blit(coin_text, (WIDTH - coin_text.get_width() - 10, 10))
         
         # Draw level
-        level_text = small_font.render(f"Level: {self.current_level}", True, WHITE)
-        screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 10))
+        level_text = self.text.render(self.small_font, f"Level: {self.current_level}", WHITE)
+        self.screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 10))
         
         # Draw controls hint
-        hint = small_font.render("ESC: Level Select", True, GRAY)
-        screen.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT - 30))
+        hint = self.text.render(self.small_font, "ESC: Level Select", GRAY)
+        self.screen.blit(hint, (WIDTH//2 - hint.get_width()//2, HEIGHT - 30))
     
     def draw_game_over(self):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        self.screen.blit(overlay, (0, 0))
         
-        game_over = font.render("GAME OVER", True, RED)
-        screen.blit(game_over, (WIDTH//2 - game_over.get_width()//2, HEIGHT//3))
+        game_over = self.text.render(self.font, "GAME OVER", RED)
+        self.screen.blit(game_over, (WIDTH//2 - game_over.get_width()//2, HEIGHT//3))
         
-        restart = small_font.render("Press ENTER to continue", True, WHITE)
-        screen.blit(restart, (WIDTH//2 - restart.get_width()//2, HEIGHT*2//3))
+        restart = self.text.render(self.small_font, "Press ENTER to continue", WHITE)
+        self.screen.blit(restart, (WIDTH//2 - restart.get_width()//2, HEIGHT*2//3))
     
     def draw_victory(self):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        self.screen.blit(overlay, (0, 0))
         
-        victory = font.render("LEVEL COMPLETE!", True, GREEN)
-        screen.blit(victory, (WIDTH//2 - victory.get_width()//2, HEIGHT//3))
+        victory = self.text.render(self.font, "LEVEL COMPLETE!", GREEN)
+        self.screen.blit(victory, (WIDTH//2 - victory.get_width()//2, HEIGHT//3))
         
-        coins = small_font.render(f"Coins collected: {self.player.coins}", True, YELLOW)
-        screen.blit(coins, (WIDTH//2 - coins.get_width()//2, HEIGHT//2))
+        coins = self.text.render(self.small_font, f"Coins collected: {self.player.coins}", YELLOW)
+        self.screen.blit(coins, (WIDTH//2 - coins.get_width()//2, HEIGHT//2))
         
-        next_level = small_font.render("Press ENTER to continue", True, WHITE)
-        screen.blit(next_level, (WIDTH//2 - next_level.get_width()//2, HEIGHT*2//3))
+        next_level = self.text.render(self.small_font, "Press ENTER to continue", WHITE)
+        self.screen.blit(next_level, (WIDTH//2 - next_level.get_width()//2, HEIGHT*2//3))
 
-# Start the game
-if __name__ == "__main__":
+def bench_broadphase(widths=(4000, 16000, 64000, 256000), ticks=600):
+    """Time player and enemy movement on generated levels of growing width.
+    
+    Player cost per tick and enemy cost per enemy should stay flat as the level widens.
+    """
+    print(f"{'width':>8} {'platforms':>10} {'enemies':>8} {'player us/tick':>15} {'us/enemy':>9}")
+    for width in widths:
+        level = Level.generate(width)
+        player = Player(*level.player_start)
+        player_time = enemy_time = 0
+        for tick in range(ticks):
+            start = time.perf_counter()
+            player.move(PLAYER_SPEED, level)
+            if tick % 40 == 0:
+                player.jump()
+            mid = time.perf_counter()
+            level.update_enemies()
+            player_time += mid - start
+            enemy_time += time.perf_counter() - mid
+        print(f"{width:>8} {len(level.platforms):>10} {len(level.enemies):>8} "
+              f"{player_time / ticks * 1e6:>15.1f} "
+              f"{enemy_time / ticks / max(1, len(level.enemies)) * 1e6:>9.2f}")
+
+def bench_entities(counts=(100, 1000, 10000), ticks=300):
+    """Compare per-object and vectorized enemy updates as the enemy count grows."""
+    print(f"{'enemies':>8} {'objects ms/tick':>16} {'vectorized ms/tick':>19}")
+    for count in counts:
+        timings = []
+        for vectorized in (False, True):
+            level = Level.generate(count * 20, enemies=count)
+            if vectorized:
+                level.vectorize()
+            player = Player(*level.player_start)
+            start = time.perf_counter()
+            for _ in range(ticks):
+                player.move(PLAYER_SPEED, level)
+                level.update_enemies()
+            timings.append((time.perf_counter() - start) / ticks * 1e3)
+        print(f"{count:>8} {timings[0]:>16.3f} {timings[1]:>19.3f}")
+
+def bench_batch(instances=64, ticks=300, process_counts=(0, 1, 2, 4)):
+    """Measure BatchEnv throughput in instance-steps per second for each pool size."""
+    level_nums = [1 + i % 3 for i in range(instances)]
+    print(f"{'processes':>9} {'instance-steps/s':>17}")
+    for processes in process_counts:
+        rng = random.Random(0)
+        with BatchEnv(level_nums, processes=processes) as env:
+            start = time.perf_counter()
+            for _ in range(ticks):
+                actions = [rng.choice((INPUT_RIGHT, INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT))
+                           for _ in range(instances)]
+                observations, rewards, dones = env.step(actions)
+                finished = [i for i, done in enumerate(dones) if done]
+                if finished:
+                    env.reset(finished)
+            elapsed = time.perf_counter() - start
+        print(f"{processes:>9} {instances * ticks / elapsed:>17.0f}")
+
+# Benchmark scenarios: name, platforms, enemies, coins
+BENCH_SCENARIOS = (
+    ("small", 50, 50, 50),
+    ("medium", 500, 500, 500),
+    ("large", 2000, 5000, 2000),
+    ("crowded", 100, 2000, 1000),
+)
+
+def bench_scenario(game, name, platforms, enemies, coins, ticks=300, frames=300):
+    """Measure simulation ticks/s and rendered frames/s on one generated level.
+    
+    Simulation time covers Player.move and the enemy update; render time covers
+    draw_game and draw_ui only, without presenting to the display. The player
+    walks right and jumps, and the level restarts from a snapshot if it ends.
+    """
+    width = 250 * max(platforms, 16) + 500
+    level = Level.generate(width, platforms=platforms, enemies=enemies, coins=coins)
+    sim = game.sim = Simulation(0, level)
+    game.render_cache = LevelRenderCache(level)
+    game.state = "playing"
+    start_state = sim.snapshot()
+    
+    def restart_if_over():
+        if sim.status != "playing":
+            sim.restore(start_state)
+    
+    sim_time = 0
+    for tick in range(ticks):
+        start = time.perf_counter()
+        sim.step(INPUT_RIGHT | (INPUT_JUMP if tick % 40 == 0 else 0))
+        sim_time += time.perf_counter() - start
+        restart_if_over()
+    
+    sim.restore(start_state)
+    render_time = 0
+    for frame in range(frames):
+        sim.step(INPUT_RIGHT | (INPUT_JUMP if frame % 40 == 0 else 0))
+        restart_if_over()
+        start = time.perf_counter()
+        game.draw_game()
+        game.draw_ui()
+        render_time += time.perf_counter() - start
+    
+    return {"scenario": name, "platforms": platforms, "enemies": enemies, "coins": coins,
+            "sim_ticks_per_s": ticks / sim_time, "render_fps": frames / render_time}
+
+def bench_suite(scenarios=BENCH_SCENARIOS, out=None, compare=None):
+    """Run the headless benchmark scenarios, optionally saving JSON and comparing to a baseline.
+    
+    Returns the number of regressions against the baseline.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    game = Game()
+    results = []
+    print(f"{'scenario':>10} {'platforms':>10} {'enemies':>8} {'coins':>6} "
+          f"{'sim ticks/s':>12} {'render fps':>11}")
+    for scenario in scenarios:
+        result = bench_scenario(game, *scenario)
+        results.append(result)
+        print(f"{result['scenario']:>10} {result['platforms']:>10} {result['enemies']:>8} "
+              f"{result['coins']:>6} {result['sim_ticks_per_s']:>12.0f} {result['render_fps']:>11.0f}")
+    
+    report = {"python": platform.python_version(), "pygame": pygame.version.ver,
+              "machine": platform.machine(), "results": results}
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    regressions = 0
+    if compare:
+        with open(compare) as f:
+            baseline = {result["scenario"]: result for result in json.load(f)["results"]}
+        print(f"\n{'scenario':>10} {'metric':>16} {'baseline':>10} {'current':>10} {'change':>8}")
+        for result in results:
+            old = baseline.get(result["scenario"])
+            if old is None:
+                continue
+            for metric in ("sim_ticks_per_s", "render_fps"):
+                change = result[metric] / old[metric] - 1
+                flag = "  REGRESSION" if change < -BENCH_TOLERANCE else ""
+                regressions += bool(flag)
+                print(f"{result['scenario']:>10} {metric:>16} {old[metric]:>10.0f} "
+                      f"{result[metric]:>10.0f} {change:>+8.1%}{flag}")
+    pygame.quit()
+    return regressions
+
+def bench_scale(factors=(2, 3, 4), frames=200):
+    """Time scaled output against drawing the game directly at the larger size.
+    
+    Scaled output is the normal 600x400 draw() plus one scale into the
+    window. The direct figure only redraws the background and level tiles
+    from copies pre-scaled once, without sprites or text, so it is a lower
+    bound on drawing everything at that size.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
     game = Game()
+    game.start_level(1)
+    start_state = game.sim.snapshot()
+    cache = game.render_cache
+    print(f"{'scale':>5} {'output':>10} {'draw ms':>8} {'nearest ms':>11} {'smooth ms':>10} "
+          f"{'direct ms':>10}")
+    for factor in factors:
+        size = (WIDTH * factor, HEIGHT * factor)
+        target = pygame.Surface(size).convert()
+        layers = [ParallaxLayer(pygame.transform.scale(layer.surface, (layer.width * factor,
+                                                                       layer.surface.get_height() * factor)),
+                                layer.speed, layer.y * factor, layer.surface.get_colorkey() is not None)
+                  for layer in game.background.layers]
+        big_chunks = {}
+        timings = {"draw": 0, "nearest": 0, "smooth": 0, "direct": 0}
+        game.sim.restore(start_state)
+        for frame in range(frames):
+            if game.sim.step(INPUT_RIGHT | (INPUT_JUMP if frame % 40 == 0 else 0)) != "playing":
+                game.sim.restore(start_state)
+            
+            start = time.perf_counter()
+            game.draw()
+            drawn = time.perf_counter()
+            pygame.transform.scale(game.screen, size, target)
+            scaled = time.perf_counter()
+            pygame.transform.smoothscale(game.screen, size, target)
+            timings["draw"] += drawn - start
+            timings["nearest"] += scaled - drawn
+            timings["smooth"] += time.perf_counter() - scaled
+            
+            start = time.perf_counter()
+            scroll_x = int(game.scroll_x)
+            for layer in layers:
+                layer.draw(target, scroll_x * factor)
+            width = cache.chunk_width
+            for index in range(scroll_x // width, (scroll_x + WIDTH - 1) // width + 1):
+                chunk = big_chunks.get(index)
+                if chunk is None:
+                    chunk = big_chunks[index] = pygame.transform.scale(
+                        cache.get_chunk(index), (width * factor, HEIGHT * factor))
+                target.blit(chunk, ((index * width - scroll_x) * factor, 0))
+            timings["direct"] += time.perf_counter() - start
+        
+        ms = {name: total / frames * 1e3 for name, total in timings.items()}
+        print(f"{factor:>5} {size[0]:>5}x{size[1]:<4} {ms['draw']:>8.2f} {ms['nearest']:>11.2f} "
+              f"{ms['smooth']:>10.2f} {ms['direct']:>10.2f}")
+    pygame.quit()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Super Mario Land")
+    parser.add_argument("--bench-broadphase", action="store_true",
+                        help="benchmark per-tick movement cost against level width and exit")
+    parser.add_argument("--bench-entities", action="store_true",
+                        help="benchmark per-object against vectorized enemy updates and exit")
+    parser.add_argument("--bench-batch", action="store_true",
+                        help="benchmark multi-instance throughput across process counts and exit")
+    parser.add_argument("--bench", action="store_true",
+                        help="run the headless physics and rendering benchmarks and exit")
+    parser.add_argument("--bench-out", metavar="PATH",
+                        help="write --bench results as JSON")
+    parser.add_argument("--bench-compare", metavar="PATH",
+                        help="compare --bench results with an earlier --bench-out file; "
+                             "exits non-zero on a regression")
+    parser.add_argument("--platforms", type=int,
+                        help="benchmark one level with this many platforms instead of the suite")
+    parser.add_argument("--enemies", type=int, default=100,
+                        help="enemy count for --platforms")
+    parser.add_argument("--coins", type=int, default=100,
+                        help="coin count for --platforms")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="keep enemy and coin state in NumPy arrays (needs numpy)")
+    parser.add_argument("--level-file", metavar="PATH",
+                        help="play a streamed level file instead of the built-in levels")
+    parser.add_argument("--generate-level", metavar="PATH",
+                        help="write a random level file of --width pixels and exit")
+    parser.add_argument("--width", type=int,
+                        help="width of generated levels (default 200000 for --generate-level, "
+                             "2000 for --solve-generated)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for --generate-level, first seed for --solve-generated")
+    parser.add_argument("--solve", metavar="LEVEL", type=int, nargs="+", choices=(1, 2, 3),
+                        help="search built-in levels for a winning input sequence and exit")
+    parser.add_argument("--solve-generated", metavar="COUNT", type=int,
+                        help="check COUNT generated levels for solvability and exit")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="worker processes for --solve and --solve-generated")
+    parser.add_argument("--sleep-offscreen", action="store_true",
+                        help="freeze enemies until they come near the screen")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save the most recent level session as a replay")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="watch a replay; press its level's number to start it")
+    parser.add_argument("--verify-replay", metavar="PATH", nargs="+",
+                        help="re-simulate replays headless against their keyframes and exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the frame profiler overlay on (F3 toggles it)")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="write frame profiler samples as JSON on exit; implies --profile")
+    parser.add_argument("--max-fps", type=int, default=FPS,
+                        help="cap on rendered frames per second, 0 for none; "
+                             f"gameplay always runs at {TICK_RATE} ticks per second")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="open the window this many times larger, scaling each frame up")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="scale the game up to fill the screen")
+    parser.add_argument("--smooth-scale", action="store_true",
+                        help="scale with filtering to any size instead of whole pixels")
+    parser.add_argument("--bench-scale", action="store_true",
+                        help="benchmark scaled output against drawing at high resolution and exit")
+    parser.add_argument("--report-startup", action="store_true",
+                        help="print the time from launch to the first frame")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen regions instead of flipping every frame")
+    args = parser.parse_args(argv)
+    
+    if args.bench_broadphase:
+        bench_broadphase()
+        return
+    if args.bench_entities:
+        bench_entities()
+        return
+    if args.bench_batch:
+        bench_batch()
+        return
+    if args.bench_scale:
+        bench_scale()
+        return
+    if args.bench or args.bench_out or args.bench_compare:
+        scenarios = BENCH_SCENARIOS
+        if args.platforms is not None:
+            scenarios = [(f"custom-{args.platforms}-{args.enemies}-{args.coins}",
+                          args.platforms, args.enemies, args.coins)]
+        sys.exit(1 if bench_suite(scenarios, args.bench_out, args.bench_compare) else 0)
+    if args.verify_replay:
+        failures = 0
+        for path in args.verify_replay:
+            tick = Replay.load(path).verify()
+            print(f"{path}: {'ok' if tick is None else f'diverged by tick {tick}'}")
+            failures += tick is not None
+        sys.exit(1 if failures else 0)
+    if args.solve or args.solve_generated:
+        specs = list(args.solve or [])
+        width = args.width or 2000
+        specs += [(width, args.seed + i) for i in range(args.solve_generated or 0)]
+        unsolved = 0
+        for result in solve_levels(specs, args.processes):
+            if result["solved"]:
+                outcome = f"solved in {len(result['witness'])} ticks: {format_inputs(result['witness'])}"
+            elif result["exhausted"]:
+                outcome = "unsolvable"
+            else:
+                outcome = "unsolved"
+            print(f"level {result['level']}: {outcome} ({result['nodes']} states)")
+            unsolved += not result["solved"]
+        sys.exit(1 if unsolved else 0)
+    if args.generate_level:
+        save_level(Level.generate(args.width or 200000, args.seed), args.generate_level)
+        return
+    if args.vectorized and np is None:
+        parser.error("--vectorized needs numpy")
+    if args.dirty_rects and (args.scale != 1 or args.fullscreen):
+        parser.error("--dirty-rects cannot be combined with --scale or --fullscreen")
+    if args.vectorized and args.level_file:
+        parser.error("--vectorized cannot be combined with --level-file")
+    if (args.record or args.replay) and args.level_file:
+        # A replay names a built-in level; the streamed level would not be re-created
+        parser.error("--record and --replay cannot be combined with --level-file")
+    
+    game = Game(dirty_rects=args.dirty_rects, vectorized=args.vectorized,
+                level_file=args.level_file, sleep_offscreen=args.sleep_offscreen,
+                record=args.record, replay=Replay.load(args.replay) if args.replay else None,
+                profile=args.profile, profile_out=args.profile_out,
+                report_startup=args.report_startup, max_fps=args.max_fps,
+                scale=args.scale, fullscreen=args.fullscreen, smooth=args.smooth_scale)
     game.run()
+
+# Start the game
+if __name__ == "__main__":
+    main()
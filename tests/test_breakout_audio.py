@@ -0,0 +1,81 @@
+"""Sound must never hold up Breakout's game loop, however slow the sink is."""
+import importlib.util
+import pathlib
+import threading
+import time
+
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+SINK_DELAY = 0.2  # Seconds each sound blocks the sink for
+
+
+def load_breakout():
+    path = pathlib.Path(__file__).resolve().parent.parent / "1.py"
+    spec = importlib.util.spec_from_file_location("breakout", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+breakout = load_breakout()
+
+
+class SlowSink:
+    """Blocks like a real device would, and remembers what it was given."""
+    def __init__(self):
+        self.played = []
+        self.threads = set()
+
+    def play(self, samples):
+        self.threads.add(threading.get_ident())
+        time.sleep(SINK_DELAY)
+        self.played.append(samples)
+
+    def close(self):
+        pass
+
+
+def test_play_returns_without_waiting_for_the_sink():
+    sink = SlowSink()
+    audio = breakout.AudioEngine(sink)
+    start = time.perf_counter()
+    for name in breakout.SOUNDS:
+        audio.play(name)
+    elapsed = time.perf_counter() - start
+    audio.close()
+
+    assert elapsed < SINK_DELAY / 4
+    assert len(sink.played) == len(breakout.SOUNDS)
+    assert threading.get_ident() not in sink.threads
+
+
+def test_game_loop_wall_time_is_unaffected_by_sound_events():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    root.withdraw()
+    sink = SlowSink()
+    audio = breakout.AudioEngine(sink)
+    try:
+        game = breakout.BreakoutGame(root, audio)
+        game.start_game()
+        game.scheduler.stop()
+        model = game.model
+
+        # Bounce off the left wall every frame: one sound event per game_loop call
+        frames = 20
+        start = time.perf_counter()
+        for _ in range(frames):
+            model.ball_x, model.ball_y = 1, 200
+            model.ball_dx, model.ball_dy = -4, 0
+            assert game.game_loop() is not False
+        elapsed = time.perf_counter() - start
+    finally:
+        audio.close()
+        root.destroy()
+
+    assert sink.played
+    assert elapsed < SINK_DELAY
@@ -0,0 +1,39 @@
+"""Restarting Breakout must reuse its screens instead of piling up widgets and canvas items."""
+import importlib.util
+import pathlib
+
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+RESTARTS = 300
+
+
+def load_breakout():
+    path = pathlib.Path(__file__).resolve().parent.parent / "1.py"
+    spec = importlib.util.spec_from_file_location("breakout", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+breakout = load_breakout()
+
+
+def test_restarts_keep_widget_and_item_counts_constant():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    root.withdraw()
+    audio = breakout.AudioEngine(breakout.NullSink())
+    try:
+        game = breakout.BreakoutGame(root, audio)
+        rows = breakout.soak(game, RESTARTS, samples=6)
+    finally:
+        audio.close()
+        root.destroy()
+
+    assert rows[-1][0] == RESTARTS
+    assert len({widgets for _, widgets, _, _ in rows}) == 1
+    assert len({items for _, _, items, _ in rows}) == 1